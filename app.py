@@ -2,70 +2,68 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from utils.data_loader import load_data_from_sheets 
+from utils.data_loader import load_data_from_sheets, huella_filtrada
+from utils.estilos import cargar_css
+from utils.filters import opciones_filtro
 
 # Configuración inicial
 st.set_page_config(page_title="Verificación de Insumos Alimentarios", page_icon="🍽️", layout="wide", initial_sidebar_state="expanded")
 
-# Estilos CSS compactados
-st.markdown("""<style>.main-header{font-size:2.5rem;color:#2C3E50;text-align:center;margin-bottom:1rem;}.sub-header{font-size:1.8rem;color:#34495E;margin-top:2rem;margin-bottom:1rem;}.metric-card{background-color:#F8F9FA;border-radius:5px;padding:1rem;box-shadow:0 0.15rem 1.75rem 0 rgba(58,59,69,0.15);}.metric-value{font-size:2rem;font-weight:bold;color:#1E88E5;}.metric-label{font-size:1rem;color:#34495E;}.highlight-text{background-color:#FFF9C4;padding:0.2rem 0.5rem;border-radius:3px;}.footer{text-align:center;margin-top:3rem;padding:1rem;font-size:0.8rem;color:#7F8C8D;}</style>""", unsafe_allow_html=True)
+# Estilos CSS (leídos una vez desde assets/)
+st.markdown(f"<style>{cargar_css('app.css')}</style>", unsafe_allow_html=True)
 
-# Función para calcular porcentajes
-def calcular_porcentaje(df, columna):
-    if columna not in df.columns or df.empty: return 0.0
-    if not pd.api.types.is_numeric_dtype(df[columna]):
-        try:
-            if df[columna].dtype == 'object': df[columna] = df[columna].str.upper().map({'SI': 1, 'NO': 0, 'S': 1, 'N': 0})
-            df[columna] = pd.to_numeric(df[columna], errors='coerce').fillna(0)
-        except Exception: return 0.0
-    return round((df[columna].sum() / len(df)) * 100, 2)
+# Columnas de cada grupo de KPIs de la página principal
+KPI_GROUPS = {
+    'Accesibilidad': ['comedor_facil_Acceso', 'vehiculo_puede_llegar_a_sitio'],
+    'Cumplimiento': ['entrega_en_dia_programado', 'alimentos_debidamente_entregados'],
+    'Calidad Vehículo': ['vehiculo_limpio_buen_estado', 'alimentos_de_calidad_cantidad', 'contenedores_para_cada_tipoalimento'],
+    'Actitud del Personal': ['actitud_conductor_respetuosa_colaborativa', 'actitud_auxiliar_respetuosa_colaborativa', 'actitud_gestora_respetuosa_colaborativa', 'buena_disposicion_recibir_mercados', 'comunicacion_efectiva', 'resolucion_inconvenientes'],
+}
 
-# Filtros globales
+# Filtros globales: se construye una sola máscara y se filtra el DataFrame una vez (se devuelven ambos)
 def get_global_filters(df):
     st.sidebar.title("Filtros")
-    df_filtrado = df.copy()
+    mascara = np.ones(len(df), dtype=bool)
 
-    # Filtro de fecha
-    if 'fecha' in df_filtrado.columns and not df_filtrado['fecha'].dropna().empty:
+    # Filtro de fecha: 'fecha' llega ordenada desde el cargador (NaT al final), el rango es un corte [lo, hi)
+    if 'fecha' in df.columns and not df['fecha'].dropna().empty:
         try:
-            if not pd.api.types.is_datetime64_any_dtype(df_filtrado['fecha']):
-                df_filtrado['fecha'] = pd.to_datetime(df_filtrado['fecha'], errors='coerce')
-            df_filtrado_fechas_validas = df_filtrado.dropna(subset=['fecha'])
-            if not df_filtrado_fechas_validas.empty:
-                min_date, max_date = df_filtrado_fechas_validas['fecha'].min().date(), df_filtrado_fechas_validas['fecha'].max().date()
+            fechas = df['fecha'].to_numpy()
+            n_validas = np.searchsorted(fechas, np.datetime64('NaT', 'ns'))
+            if n_validas:
+                min_date, max_date = pd.Timestamp(fechas[0]).date(), pd.Timestamp(fechas[n_validas - 1]).date()
                 date_range = st.sidebar.date_input("Rango de fechas", value=(min_date, max_date), min_value=min_date, max_value=max_date, key="global_date_filter")
                 if len(date_range) == 2:
                     start_date, end_date = date_range
-                    start_datetime, end_datetime = pd.to_datetime(start_date), pd.to_datetime(end_date) + pd.Timedelta(days=1)
-                    df_filtrado = df_filtrado[(df_filtrado['fecha'] >= start_datetime) & (df_filtrado['fecha'] < end_datetime)]
+                    inicio, fin = np.datetime64(start_date, 'ns'), np.datetime64(end_date, 'ns') + np.timedelta64(1, 'D')
+                    lo, hi = np.searchsorted(fechas[:n_validas], [inicio, fin], side='left')
+                    mascara[:lo] = False
+                    mascara[hi:] = False
             else: st.sidebar.warning("No hay fechas válidas para filtrar.")
         except Exception as e: st.sidebar.warning(f"Error al aplicar filtro de fechas: {e}")
     
-    # Filtro de comuna
-    if 'comuna' in df_filtrado.columns and not df_filtrado['comuna'].dropna().empty:
-        comunas_validas = sorted(df_filtrado['comuna'].dropna().unique().tolist())
-        if comunas_validas:
-            comunas = ['Todas'] + comunas_validas
-            comuna_seleccionada = st.sidebar.selectbox("Comuna", comunas, key="global_comuna_filter")
-            if comuna_seleccionada != 'Todas': df_filtrado = df_filtrado[df_filtrado['comuna'] == comuna_seleccionada]
-    
-    # Filtro de ruta
-    if 'ruta' in df_filtrado.columns and not df_filtrado['ruta'].dropna().empty:
-        rutas_validas = sorted(df_filtrado['ruta'].dropna().unique().tolist())
-        if rutas_validas:
-            rutas = ['Todas'] + rutas_validas
-            ruta_seleccionada = st.sidebar.selectbox("Ruta", rutas, key="global_ruta_filter")
-            if ruta_seleccionada != 'Todas': df_filtrado = df_filtrado[df_filtrado['ruta'] == ruta_seleccionada]
-    
-    # Filtro de nodo
-    if 'nodo' in df_filtrado.columns and not df_filtrado['nodo'].dropna().empty:
-        nodos_validos = sorted(df_filtrado['nodo'].dropna().unique().tolist())
-        if nodos_validos:
-            nodos = ['Todos'] + nodos_validos
-            nodo_seleccionado = st.sidebar.selectbox("Nodo", nodos, key="global_nodo_filter")
-            if nodo_seleccionado != 'Todos': df_filtrado = df_filtrado[df_filtrado['nodo'] == nodo_seleccionado]
-    
-    return df_filtrado
+    # Filtros de comuna, ruta y nodo (las opciones dependen de los filtros anteriores)
+    for columna, etiqueta, todos in [('comuna', "Comuna", 'Todas'), ('ruta', "Ruta", 'Todas'), ('nodo', "Nodo", 'Todos')]:
+        if columna not in df.columns:
+            continue
+        serie = df[columna]
+        opciones = opciones_filtro(serie[mascara])
+        if opciones:
+            seleccion = st.sidebar.selectbox(etiqueta, [todos] + opciones, key=f"global_{columna}_filter")
+            if seleccion != todos: mascara &= (serie == seleccion).to_numpy()
+    
+    return (df if mascara.all() else df[mascara]), mascara
+
+# KPIs principales: una sola reducción sobre todas las columnas de indicadores
+def mostrar_kpis(filtered_df):
+    present = {grupo: [col for col in cols if col in filtered_df.columns] for grupo, cols in KPI_GROUPS.items()}
+    flat = [col for cols in present.values() for col in cols]
+    means = filtered_df[flat].mean().mul(100) if not filtered_df.empty else pd.Series(0.0, index=flat)
+    
+    for kpi_col, (grupo, cols) in zip(st.columns(len(KPI_GROUPS)), present.items()):
+        pct = means.loc[cols].mean() if cols else 0.0
+        with kpi_col:
+            st.markdown(f"""<div class="metric-card"><p class="metric-label">{grupo}</p><p class="metric-value">{pct:.1f}%</p></div>""", unsafe_allow_html=True)
 
 # Página principal
 def main():
@@ -77,40 +75,15 @@ def main():
     if df_original is None or df_original.empty:
         st.error("No se pudieron cargar los datos. Por favor, verifique la fuente de datos o la conexión.")
         return
-    filtered_df = get_global_filters(df_original.copy())
+    filtered_df, mascara = get_global_filters(df_original)
     st.session_state['filtered_df'] = filtered_df
+    # Huella del contenido filtrado: clave de las cachés de las páginas (cambia si cambian los datos).
+    # Combina la huella de la carga con la máscara, sin volver a recorrer los datos en cada interacción
+    st.session_state['filtered_huella'] = huella_filtrada(df_original, mascara)
     
     # KPIs principales
     st.markdown('<h2 class="sub-header">Indicadores Clave de Desempeño</h2>', unsafe_allow_html=True)
-    col1, col2, col3, col4 = st.columns(4)
-    
-    # Indicadores de accesibilidad
-    with col1:
-        accesibilidad_cols = ['comedor_facil_Acceso', 'vehiculo_puede_llegar_a_sitio']
-        valid_accesibilidad_cols = [col for col in accesibilidad_cols if col in filtered_df.columns]
-        pct_accesibilidad = sum(calcular_porcentaje(filtered_df, col) for col in valid_accesibilidad_cols) / len(valid_accesibilidad_cols) if valid_accesibilidad_cols else 0.0
-        st.markdown(f"""<div class="metric-card"><p class="metric-label">Accesibilidad</p><p class="metric-value">{pct_accesibilidad:.1f}%</p></div>""", unsafe_allow_html=True)
-    
-    # Indicadores de cumplimiento
-    with col2:
-        cumplimiento_cols = ['entrega_en_dia_programado', 'alimentos_debidamente_entregados']
-        valid_cumplimiento_cols = [col for col in cumplimiento_cols if col in filtered_df.columns]
-        pct_cumplimiento = sum(calcular_porcentaje(filtered_df, col) for col in valid_cumplimiento_cols) / len(valid_cumplimiento_cols) if valid_cumplimiento_cols else 0.0
-        st.markdown(f"""<div class="metric-card"><p class="metric-label">Cumplimiento</p><p class="metric-value">{pct_cumplimiento:.1f}%</p></div>""", unsafe_allow_html=True)
-    
-    # Indicadores de calidad del vehículo
-    with col3:
-        vehiculo_cols = ['vehiculo_limpio_buen_estado', 'alimentos_de_calidad_cantidad', 'contenedores_para_cada_tipoalimento']
-        valid_vehiculo_cols = [col for col in vehiculo_cols if col in filtered_df.columns]
-        pct_vehiculo = sum(calcular_porcentaje(filtered_df, col) for col in valid_vehiculo_cols) / len(valid_vehiculo_cols) if valid_vehiculo_cols else 0.0
-        st.markdown(f"""<div class="metric-card"><p class="metric-label">Calidad Vehículo</p><p class="metric-value">{pct_vehiculo:.1f}%</p></div>""", unsafe_allow_html=True)
-    
-    # Indicadores actitudinales
-    with col4:
-        actitud_cols = ['actitud_conductor_respetuosa_colaborativa', 'actitud_auxiliar_respetuosa_colaborativa', 'actitud_gestora_respetuosa_colaborativa', 'buena_disposicion_recibir_mercados', 'comunicacion_efectiva', 'resolucion_inconvenientes']
-        valid_actitud_cols = [col for col in actitud_cols if col in filtered_df.columns]
-        pct_actitud = sum(calcular_porcentaje(filtered_df, col) for col in valid_actitud_cols) / len(valid_actitud_cols) if valid_actitud_cols else 0.0
-        st.markdown(f"""<div class="metric-card"><p class="metric-label">Actitud del Personal</p><p class="metric-value">{pct_actitud:.1f}%</p></div>""", unsafe_allow_html=True)
+    mostrar_kpis(filtered_df)
     
     # Descripción general
     st.markdown("""
@@ -4,7 +4,9 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
-from utils.data_loader import load_data_from_sheets
+from utils.data_loader import load_data_from_sheets, huella_datos, huella_carga
+from utils.estilos import cargar_css
+from utils.metrics import calcular_porcentaje
 
 # Configuración de la página
 st.set_page_config(
@@ -13,36 +15,17 @@ st.set_page_config(
     layout="wide"
 )
 
-# Estilos CSS para la página
-st.markdown("""
-<style>
-    .page-title {font-size:2.3rem;font-weight:bold;color:#1E3A8A;text-align:center;margin-bottom:1.5rem;padding-bottom:1rem;border-bottom:2px solid #E0E0E0;}
-    .section-header {font-size:1.5rem;color:#2563EB;margin:2rem 0 1rem 0;padding-bottom:0.5rem;border-bottom:1px solid #E0E0E0;}
-    .metric-card {background-color:#F9FAFB;border-radius:8px;padding:1.2rem;box-shadow:0 4px 6px rgba(0,0,0,0.1);text-align:center;height:100%;}
-    .metric-title {font-size:1.1rem;font-weight:600;color:#4B5563;margin-bottom:0.5rem;}
-    .metric-value {font-size:2.5rem;font-weight:bold;}
-    .metric-good {color:#10B981;}
-    .metric-warning {color:#F59E0B;}
-    .metric-bad {color:#EF4444;}
-    .info-box {background-color:#EFF6FF;border-left:4px solid #3B82F6;padding:1rem;margin:1rem 0;border-radius:0 4px 4px 0;}
-    .alert-box {background-color:#FEF2F2;border-left:4px solid #EF4444;padding:1rem;margin:1rem 0;border-radius:0 4px 4px 0;}
-    .insight-box {background-color:#ECFDF5;border-left:4px solid #10B981;padding:1rem;margin:1rem 0;border-radius:0 4px 4px 0;}
-    .chart-container {background-color:white;border-radius:8px;padding:1rem;box-shadow:0 4px 6px rgba(0,0,0,0.05);margin-bottom:1.5rem;}
-</style>
-""", unsafe_allow_html=True)
+# Estilos CSS para la página (leídos una vez desde assets/)
+st.markdown(f"<style>{cargar_css('accesibilidad.css')}</style>", unsafe_allow_html=True)
 
-# Función para obtener datos
+# Función para obtener datos y la huella de su contenido (clave de las figuras cacheadas)
 def get_data():
     if 'filtered_df' in st.session_state:
-        return st.session_state['filtered_df']
+        df = st.session_state['filtered_df']
+        return df, st.session_state.get('filtered_huella') or huella_datos(df)
     else:
-        return load_data_from_sheets()
-
-# Función para calcular el porcentaje de Sí (1) en una columna
-def calcular_porcentaje(df, columna):
-    if columna not in df.columns or df.empty:
-        return 0
-    return round((df[columna].sum() / len(df)) * 100, 2)
+        df = load_data_from_sheets()
+        return df, huella_carga(df)
 
 def crear_metrica_html(titulo, valor, descripcion=None, umbral_bueno=90, umbral_medio=70):
     clase_color = "metric-good" if valor >= umbral_bueno else "metric-warning" if valor >= umbral_medio else "metric-bad"
@@ -56,23 +39,35 @@ def crear_metrica_html(titulo, valor, descripcion=None, umbral_bueno=90, umbral_
     html += "</div>"
     return html
 
+# Reducciones por columna cacheadas: se recalculan solo cuando cambian los valores filtrados
+@st.cache_data(show_spinner=False)
+def estadisticas_columna(valores):
+    stats = {'sum': 0, 'min': None, 'max': None, 'mean': None, 'conteo': None}
+    if valores.size:
+        acumulador = np.float64 if valores.dtype.kind == 'f' else None
+        stats.update(sum=valores.sum(dtype=acumulador), min=valores.min(), max=valores.max(), mean=valores.mean(dtype=acumulador))
+    if valores.dtype.kind in 'biu':
+        # Columnas Sí/No (0/1): dos cubetas con bincount en lugar de value_counts
+        stats['conteo'] = np.bincount(valores.astype(np.int64), minlength=2)
+    return stats
+
+def conteo_si_no(df, columna):
+    # Conteos y porcentajes en orden [Sí, No]
+    conteo = estadisticas_columna(df[columna].to_numpy())['conteo'][1::-1]
+    return conteo, np.round(conteo / max(conteo.sum(), 1) * 100, 2)
+
 def crear_grafico_barras(df, columna, titulo):
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Valor', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
-    conteo['Respuesta'] = conteo['Valor'].map({1: 'Sí', 0: 'No'})
-    
-    fig = px.bar(
-        conteo,
-        x='Respuesta',
-        y='Porcentaje',
-        text=conteo['Porcentaje'].apply(lambda x: f'{x}%'),
-        color='Respuesta',
-        color_discrete_map={'Sí': '#10B981', 'No': '#EF4444'},
-        title=titulo
-    )
+    _, porcentaje = conteo_si_no(df, columna)
+    
+    fig = go.Figure(go.Bar(
+        x=['Sí', 'No'],
+        y=porcentaje,
+        text=[f'{v}%' for v in porcentaje],
+        marker_color=['#10B981', '#EF4444']
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='',
         yaxis_title='Porcentaje (%)',
         yaxis_range=[0, 100]
@@ -81,59 +76,80 @@ def crear_grafico_barras(df, columna, titulo):
     return fig
 
 def crear_grafico_pastel(df, columna, titulo):
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Valor', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
-    conteo['Respuesta'] = conteo['Valor'].map({1: 'Sí', 0: 'No'})
-    
-    fig = px.pie(
-        conteo,
-        values='Conteo',
-        names='Respuesta',
-        title=titulo,
-        hole=0.4,
-        color='Respuesta',
-        color_discrete_map={'Sí': '#10B981', 'No': '#EF4444'},
-    )
+    conteo, _ = conteo_si_no(df, columna)
     
-    fig.update_traces(
+    fig = go.Figure(go.Pie(
+        labels=['Sí', 'No'],
+        values=conteo,
+        hole=0.4,
+        sort=False,
         textposition='inside',
         textinfo='percent+label',
-        marker=dict(line=dict(color='#FFFFFF', width=2))
-    )
+        marker=dict(colors=['#10B981', '#EF4444'], line=dict(color='#FFFFFF', width=2))
+    ))
+    
+    fig.update_layout(title=titulo)
     
     return fig
 
+# Histograma precalculado con NumPy: solo conteos y bordes viajan a Plotly
+@st.cache_data(show_spinner=False)
+def histograma_columna(valores, n_bins):
+    valores = valores[valores > 0]
+    if not valores.size:
+        return None
+    return np.histogram(valores, bins=n_bins)
+
 def crear_histograma(df, columna, titulo, n_bins=20):
     if columna not in df.columns or df.empty:
         return None
     
-    df_filtrado = df[df[columna] > 0]
+    histograma = histograma_columna(df[columna].to_numpy(), n_bins)
     
-    if df_filtrado.empty:
+    if histograma is None:
         return None
     
-    fig = px.histogram(
-        df_filtrado,
-        x=columna,
-        nbins=n_bins,
-        title=titulo,
-        color_discrete_sequence=['#3B82F6']
-    )
+    conteos, bordes = histograma
+    fig = go.Figure(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2,
+        y=conteos,
+        width=np.diff(bordes),
+        marker_color='#3B82F6'
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='Valor ($)',
-        yaxis_title='Frecuencia'
+        yaxis_title='Frecuencia',
+        bargap=0
     )
     
     return fig
 
+# Figuras cacheadas por (tipo, columna, huella de los datos); el DataFrame no se hashea.
+# cache_data entrega una copia en cada llamada: ninguna sesión comparte la misma figura
+CONSTRUCTORES_FIGURA = {'barras': crear_grafico_barras, 'pastel': crear_grafico_pastel, 'histograma': crear_histograma}
+
+@st.cache_data(max_entries=64, ttl=600, show_spinner=False)
+def figura_cacheada(tipo, columna, titulo, huella, _df):
+    return CONSTRUCTORES_FIGURA[tipo](_df, columna, titulo)
+
+def figura(tipo, df, huella, columna, titulo):
+    return figura_cacheada(tipo, columna, titulo, huella, df)
+
+# Fila de gráficos de barras, uno por columna presente
+def mostrar_fila_barras(df, huella, graficos):
+    for col, (columna, titulo) in zip(st.columns(len(graficos)), graficos):
+        with col:
+            if columna in df.columns:
+                st.plotly_chart(figura('barras', df, huella, columna, titulo), use_container_width=True)
+
 def main():
     # Título de la página
     st.markdown('<h1 class="page-title">Análisis de Accesibilidad al Comedor Comunitario</h1>', unsafe_allow_html=True)
     
     # Cargar datos
-    df = get_data()
+    df, huella = get_data()
     
     # Descripción del análisis
     st.markdown("""
@@ -149,6 +165,12 @@ def main():
         st.error("No hay datos disponibles para analizar. Por favor, verifica la conexión con la fuente de datos.")
         return
     
+    # Totales de costos adicionales: una sola reducción por columnas, reutilizada en costos y recomendaciones
+    hay_costos = 'valor_trasbordo' in df.columns and 'valor_apoyo' in df.columns
+    if hay_costos:
+        total_trasbordo, total_apoyo = df[['valor_trasbordo', 'valor_apoyo']].to_numpy().sum(axis=0, dtype=np.float64)
+        total_costos = total_trasbordo + total_apoyo
+    
     # Columnas de accesibilidad que vamos a analizar
     columnas_accesibilidad = [
         'comedor_facil_Acceso',
@@ -201,17 +223,10 @@ def main():
     # Análisis de Acceso
     st.markdown('<h2 class="section-header">Análisis de Acceso al Comedor</h2>', unsafe_allow_html=True)
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        if 'comedor_facil_Acceso' in df.columns:
-            fig = crear_grafico_barras(df, 'comedor_facil_Acceso', 'Comedores con Fácil Acceso')
-            st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        if 'vehiculo_puede_llegar_a_sitio' in df.columns:
-            fig = crear_grafico_barras(df, 'vehiculo_puede_llegar_a_sitio', 'Vehículo Puede Llegar Directamente')
-            st.plotly_chart(fig, use_container_width=True)
+    mostrar_fila_barras(df, huella, [
+        ('comedor_facil_Acceso', 'Comedores con Fácil Acceso'),
+        ('vehiculo_puede_llegar_a_sitio', 'Vehículo Puede Llegar Directamente')
+    ])
     
     # Análisis de Trasbordos
     st.markdown('<h2 class="section-header">Análisis de Trasbordos</h2>', unsafe_allow_html=True)
@@ -220,17 +235,17 @@ def main():
     
     with col1:
         if 'trasbordo' in df.columns:
-            fig = crear_grafico_pastel(df, 'trasbordo', 'Necesidad de Trasbordo')
+            fig = figura('pastel', df, huella, 'trasbordo', 'Necesidad de Trasbordo')
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         if 'valor_trasbordo' in df.columns:
-            df_trasbordo = df[df['trasbordo'] == 1].copy()
+            # Solo el arreglo de costos de los registros marcados, sin copiar el DataFrame
+            valores_trasbordo = df['valor_trasbordo'].to_numpy()[df['trasbordo'].to_numpy() == 1]
             
-            if not df_trasbordo.empty:
-                trasbordo_min = df_trasbordo['valor_trasbordo'].min()
-                trasbordo_max = df_trasbordo['valor_trasbordo'].max()
-                trasbordo_avg = df_trasbordo['valor_trasbordo'].mean()
+            if valores_trasbordo.size:
+                stats_trasbordo = estadisticas_columna(valores_trasbordo)
+                trasbordo_min, trasbordo_max, trasbordo_avg = stats_trasbordo['min'], stats_trasbordo['max'], stats_trasbordo['mean']
                 
                 st.markdown(f"""
                     <div class="info-box">
@@ -241,7 +256,7 @@ def main():
                     </div>
                 """, unsafe_allow_html=True)
                 
-                fig = crear_histograma(df, 'valor_trasbordo', 'Distribución de Costos de Trasbordo')
+                fig = figura('histograma', df, huella, 'valor_trasbordo', 'Distribución de Costos de Trasbordo')
                 
                 if fig:
                     st.plotly_chart(fig, use_container_width=True)
@@ -255,17 +270,17 @@ def main():
     
     with col1:
         if 'ingreso_apoyo_comunidad' in df.columns:
-            fig = crear_grafico_pastel(df, 'ingreso_apoyo_comunidad', 'Necesidad de Apoyo Comunitario')
+            fig = figura('pastel', df, huella, 'ingreso_apoyo_comunidad', 'Necesidad de Apoyo Comunitario')
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         if 'valor_apoyo' in df.columns:
-            df_apoyo = df[df['ingreso_apoyo_comunidad'] == 1].copy()
+            # Solo el arreglo de costos de los registros marcados, sin copiar el DataFrame
+            valores_apoyo = df['valor_apoyo'].to_numpy()[df['ingreso_apoyo_comunidad'].to_numpy() == 1]
             
-            if not df_apoyo.empty:
-                apoyo_min = df_apoyo['valor_apoyo'].min()
-                apoyo_max = df_apoyo['valor_apoyo'].max()
-                apoyo_avg = df_apoyo['valor_apoyo'].mean()
+            if valores_apoyo.size:
+                stats_apoyo = estadisticas_columna(valores_apoyo)
+                apoyo_min, apoyo_max, apoyo_avg = stats_apoyo['min'], stats_apoyo['max'], stats_apoyo['mean']
                 
                 st.markdown(f"""
                     <div class="info-box">
@@ -276,7 +291,7 @@ def main():
                     </div>
                 """, unsafe_allow_html=True)
                 
-                fig = crear_histograma(df, 'valor_apoyo', 'Distribución de Costos de Apoyo Comunitario')
+                fig = figura('histograma', df, huella, 'valor_apoyo', 'Distribución de Costos de Apoyo Comunitario')
                 
                 if fig:
                     st.plotly_chart(fig, use_container_width=True)
@@ -290,7 +305,7 @@ def main():
     
     with col1:
         if 'demora_entregas' in df.columns:
-            fig = crear_grafico_barras(df, 'demora_entregas', 'Demora en Otras Entregas')
+            fig = figura('barras', df, huella, 'demora_entregas', 'Demora en Otras Entregas')
             st.plotly_chart(fig, use_container_width=True)
             
             pct_demora = calcular_porcentaje(df, 'demora_entregas')
@@ -305,7 +320,7 @@ def main():
     
     with col2:
         if 'inocuidad_comprometida' in df.columns:
-            fig = crear_grafico_barras(df, 'inocuidad_comprometida', 'Inocuidad Comprometida')
+            fig = figura('barras', df, huella, 'inocuidad_comprometida', 'Inocuidad Comprometida')
             st.plotly_chart(fig, use_container_width=True)
             
             pct_inocuidad = calcular_porcentaje(df, 'inocuidad_comprometida')
@@ -322,10 +337,7 @@ def main():
     # Análisis de Costos Totales
     st.markdown('<h2 class="section-header">Análisis de Costos Adicionales</h2>', unsafe_allow_html=True)
     
-    if 'valor_trasbordo' in df.columns and 'valor_apoyo' in df.columns:
-        total_trasbordo = df['valor_trasbordo'].sum()
-        total_apoyo = df['valor_apoyo'].sum()
-        total_costos = total_trasbordo + total_apoyo
+    if hay_costos:
         
         col1, col2, col3 = st.columns(3)
         
@@ -363,12 +375,12 @@ def main():
     # Conclusiones y Recomendaciones
     st.markdown('<h2 class="section-header">Conclusiones y Recomendaciones</h2>', unsafe_allow_html=True)
     
-    pct_acceso_facil = calcular_porcentaje(df, 'comedor_facil_Acceso')
-    pct_vehiculo_llega = calcular_porcentaje(df, 'vehiculo_puede_llegar_a_sitio')
-    pct_trasbordo = calcular_porcentaje(df, 'trasbordo')
-    pct_apoyo = calcular_porcentaje(df, 'ingreso_apoyo_comunidad')
-    pct_demora = calcular_porcentaje(df, 'demora_entregas')
-    pct_inocuidad = calcular_porcentaje(df, 'inocuidad_comprometida')
+    # Todos los porcentajes de conclusiones en una sola reducción (columnas ausentes = 0)
+    columnas_conclusiones = ['comedor_facil_Acceso', 'vehiculo_puede_llegar_a_sitio', 'trasbordo',
+                             'ingreso_apoyo_comunidad', 'demora_entregas', 'inocuidad_comprometida']
+    presentes = [col for col in columnas_conclusiones if col in df.columns]
+    pct = (df[presentes].mean() * 100).round(2).reindex(columnas_conclusiones).fillna(0)
+    pct_acceso_facil, pct_vehiculo_llega, pct_trasbordo, pct_apoyo, pct_demora, pct_inocuidad = pct.tolist()
     
     conclusiones = []
     
@@ -403,10 +415,8 @@ def main():
     if pct_demora > 10:
         recomendaciones.append("Optimizar la programación de rutas considerando los tiempos adicionales necesarios para comedores con acceso difícil.")
     
-    if 'valor_trasbordo' in df.columns and 'valor_apoyo' in df.columns:
-        total_costos = df['valor_trasbordo'].sum() + df['valor_apoyo'].sum()
-        if total_costos > 0:
-            recomendaciones.append(f"Evaluar el costo-beneficio de las mejoras en accesibilidad frente a los ${total_costos:,.0f} en costos adicionales por trasbordos y apoyo comunitario.")
+    if hay_costos and total_costos > 0:
+        recomendaciones.append(f"Evaluar el costo-beneficio de las mejoras en accesibilidad frente a los ${total_costos:,.0f} en costos adicionales por trasbordos y apoyo comunitario.")
     
     if recomendaciones:
         st.markdown("<h3>Recomendaciones</h3>", unsafe_allow_html=True)
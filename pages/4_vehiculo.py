@@ -1,126 +1,132 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from utils.data_loader import load_data_from_sheets
+import plotly.graph_objects as go
+from utils.data_loader import load_data_from_sheets, huella_datos, huella_carga
+from utils.estilos import cargar_css
 
 # Configuración de la página
 st.set_page_config(page_title="Condiciones del Vehículo", page_icon="🚚", layout="wide")
 
-# Estilos CSS básicos para la página
-st.markdown("""
-<style>
-    .page-title {font-size: 2.3rem; font-weight: bold; color: #4338CA; text-align: center; margin-bottom: 1.5rem; border-bottom: 2px solid #E0E0E0;}
-    .section-header {font-size: 1.5rem; color: #6366F1; margin: 2rem 0 1rem 0; border-bottom: 1px solid #E0E0E0;}
-    .comparison-title {font-size: 1.2rem; font-weight: 600; color: #4B5563; margin-top: 1rem; margin-bottom: 0.5rem; text-align: center;}
-</style>
-""", unsafe_allow_html=True)
+# Estilos CSS básicos para la página (leídos una vez desde assets/)
+st.markdown(f"<style>{cargar_css('vehiculo.css')}</style>", unsafe_allow_html=True)
 
-# Función para obtener datos
+# Función para obtener datos y la huella de su contenido (clave de las cachés de la página)
 def get_data():
     if 'filtered_df' in st.session_state:
-        return st.session_state['filtered_df']
-    return load_data_from_sheets()
+        df = st.session_state['filtered_df']
+        return df, st.session_state.get('filtered_huella') or huella_datos(df)
+    df = load_data_from_sheets()
+    return df, huella_carga(df)
 
-# Función para calcular el porcentaje de valores positivos
-def calcular_porcentaje(df, columna):
-    if columna not in df.columns or df.empty:
-        return 0
-    return round((df[columna].sum() / len(df)) * 100, 2)
-
-# Función para crear gráfico de barras
-def crear_grafico_barras(df, columna, titulo):
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Valor', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
-    conteo['Respuesta'] = conteo['Valor'].map({1: 'Sí', 0: 'No'})
-    
-    fig = px.bar(
-        conteo,
-        x='Respuesta',
-        y='Porcentaje',
-        text=conteo['Porcentaje'].apply(lambda x: f'{x}%'),
-        color='Respuesta',
-        color_discrete_map={'Sí': '#6366F1', 'No': '#EF4444'},
-        title=titulo
-    )
-    fig.update_layout(xaxis_title='', yaxis_title='Porcentaje (%)', yaxis_range=[0, 100])
-    return fig
-
-# Función para crear gráfico de pastel
-def crear_grafico_pastel(df, columna, titulo):
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Valor', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
-    conteo['Respuesta'] = conteo['Valor'].map({1: 'Sí', 0: 'No'})
-    
-    fig = px.pie(
-        conteo,
-        values='Conteo',
-        names='Respuesta',
-        title=titulo,
+# Figuras base de los gráficos Sí/No: cada gráfico solo cambia los datos y el título
+COLORES_SI_NO = ['#6366F1', '#EF4444']
+PLANTILLA_BARRAS = go.Figure(
+    go.Bar(x=['Sí', 'No'], texttemplate='%{text}%', marker_color=COLORES_SI_NO),
+    layout=dict(xaxis_title='', yaxis_title='Porcentaje (%)', yaxis_range=[0, 100])
+)
+PLANTILLA_PASTEL = go.Figure(
+    go.Pie(
+        labels=['Sí', 'No'],
         hole=0.4,
-        color='Respuesta',
-        color_discrete_map={'Sí': '#6366F1', 'No': '#EF4444'}
-    )
-    fig.update_traces(
+        sort=False,
         textposition='inside',
         textinfo='percent+label',
-        marker=dict(line=dict(color='#FFFFFF', width=2))
+        marker=dict(colors=COLORES_SI_NO, line=dict(color='#FFFFFF', width=2))
     )
+)
+
+# Función para crear gráfico de barras a partir del conteo [Sí, No] precalculado en main.
+# Las figuras se cachean por (conteo, título): el conteo ya identifica los datos graficados.
+# cache_data entrega una copia en cada llamada: ninguna sesión comparte la misma figura
+@st.cache_data(max_entries=32, ttl=600, show_spinner=False)
+def crear_grafico_barras(conteo, titulo):
+    porcentaje = np.round(conteo / max(conteo.sum(), 1) * 100, 2)
+    
+    fig = go.Figure(PLANTILLA_BARRAS)
+    fig.update_traces(y=porcentaje, text=porcentaje)
+    fig.update_layout(title=titulo)
     return fig
 
-# Función para crear análisis por vehículo
-def crear_analisis_por_vehiculo(df):
-    if 'placa_vehiculo' not in df.columns or df.empty:
-        return None
-    
-    columnas_vehiculo = [
-        'vehiculo_limpio_buen_estado',
-        'alimentos_de_calidad_cantidad',
-        'contenedores_para_cada_tipoalimento'
-    ]
-    
-    columnas_existentes = [col for col in columnas_vehiculo if col in df.columns]
-    if not columnas_existentes:
+# Función para crear gráfico de pastel a partir del conteo [Sí, No] precalculado en main
+@st.cache_data(max_entries=32, ttl=600, show_spinner=False)
+def crear_grafico_pastel(conteo, titulo):
+    fig = go.Figure(PLANTILLA_PASTEL)
+    fig.update_traces(values=conteo)
+    fig.update_layout(title=titulo)
+    return fig
+
+# Medias por grupo: sobre una categórica se acumulan sumas y conteos por código con np.bincount
+# (sin tabla hash); para otros tipos se usa el groupby de pandas
+def medias_por_grupo(grupo, valores):
+    if not isinstance(grupo.dtype, pd.CategoricalDtype):
+        medias = valores.groupby(grupo, sort=False).mean()
+        return medias.index, medias.to_numpy()
+    
+    codigos = grupo.cat.codes.to_numpy()
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    k = len(grupo.cat.categories)
+    conteos = np.bincount(codigos, minlength=k)
+    sumas = np.column_stack([np.bincount(codigos, weights=columna[validos], minlength=k) for columna in valores.to_numpy().T])
+    presentes = conteos > 0
+    return grupo.cat.categories[presentes], sumas[presentes] / conteos[presentes, None]
+
+# Función para crear análisis por vehículo (columnas_existentes: indicadores presentes, calculados en main)
+def crear_analisis_por_vehiculo(df, columnas_existentes):
+    if 'placa_vehiculo' not in df.columns or df.empty or not columnas_existentes:
         return None
     
-    resultados = pd.DataFrame()
-    for col in columnas_existentes:
-        temp = df.groupby('placa_vehiculo')[col].mean().reset_index()
-        temp[col] = temp[col] * 100
-        if resultados.empty:
-            resultados = temp
-        else:
-            resultados = resultados.merge(temp, on='placa_vehiculo')
+    # Medias por vehículo de todos los indicadores en una pasada (sin merges por columna)
+    placas, medias = medias_por_grupo(df['placa_vehiculo'], df[columnas_existentes])
+    resultados = pd.DataFrame(medias * 100, columns=columnas_existentes)
+    resultados.insert(0, 'placa_vehiculo', placas)
     
-    resultados['promedio_general'] = resultados[columnas_existentes].mean(axis=1)
-    resultados = resultados.sort_values(by='promedio_general', ascending=False)
+    # Promedio horizontal sobre el bloque numérico (sin la reducción por filas de pandas)
+    resultados['promedio_general'] = resultados[columnas_existentes].to_numpy().mean(axis=1)
     
+    # Orden descendente estable (los empates conservan su orden); con muchos vehículos solo los
+    # 10 mejores y los 10 peores, cortados del mismo orden para que nunca se repita una placa
+    orden = np.argsort(-resultados['promedio_general'].to_numpy(), kind='stable')
     if len(resultados) > 20:
-        mejores = resultados.head(10)
-        peores = resultados.tail(10)
-        resultados = pd.concat([mejores, peores])
+        orden = orden[np.r_[:10, -10:0]]
+    resultados = resultados.iloc[orden]
     
     fig = px.bar(
         resultados,
         x='placa_vehiculo',
         y='promedio_general',
-        text=resultados['promedio_general'].apply(lambda x: f'{x:.1f}%'),
+        text='promedio_general',
         title='Calificación General por Vehículo',
         color='promedio_general',
         color_continuous_scale='RdYlGn'
     )
+    fig.update_traces(texttemplate='%{text:.1f}%')
     fig.update_layout(xaxis_title='Placa del Vehículo', yaxis_title='Calificación Promedio (%)', yaxis_range=[0, 100])
     
     return fig, resultados
 
+# Análisis por vehículo (figura y tabla) cacheado por huella de los datos; el DataFrame no se hashea
+@st.cache_data(max_entries=16, ttl=600, show_spinner=False)
+def analisis_por_vehiculo_cacheado(huella, columnas, _df):
+    return crear_analisis_por_vehiculo(_df, list(columnas))
+
+# Agregados de la página por huella de los datos: filas, sumas por indicador y porcentajes por ruta
+# (un solo groupby). El número de filas sale del mismo DataFrame que las sumas.
+@st.cache_data(max_entries=16, ttl=600, show_spinner=False)
+def agregados_indicadores(huella, columnas, _df):
+    columnas = list(columnas)
+    sumas = _df[columnas].sum()
+    ruta_means = _df.groupby('ruta', sort=False, observed=True)[columnas].mean().mul(100) if 'ruta' in _df.columns else None
+    return len(_df), sumas, ruta_means
+
 # Función para generar análisis con componentes nativos de Streamlit
-def generar_analisis_streamlit(df, columna, titulo):
+def generar_analisis_streamlit(df, columna, titulo, valor_positivo, ruta_series=None):
     if columna not in df.columns or df.empty:
         st.warning(f"No hay datos suficientes para analizar {titulo.lower()}.")
         return
     
-    valor_positivo = calcular_porcentaje(df, columna)
     valor_negativo = 100 - valor_positivo
     
     # Categorizar el resultado y elegir el tipo de contenedor
@@ -144,29 +150,80 @@ def generar_analisis_streamlit(df, columna, titulo):
     with col2:
         st.metric(label="No Cumplimiento", value=f"{valor_negativo}%", delta=f"-{valor_negativo:.1f}%", delta_color="inverse")
     
-    # Análisis por ruta si existe
-    if 'ruta' in df.columns:
-        rutas = df.groupby('ruta')[columna].mean().reset_index()
-        rutas[columna] = rutas[columna] * 100
-        mejor_ruta = rutas.loc[rutas[columna].idxmax()]
-        peor_ruta = rutas.loc[rutas[columna].idxmin()]
+    # Análisis por ruta si existe (porcentajes por ruta precalculados en main)
+    if ruta_series is not None and not ruta_series.empty:
+        mejor_ruta, peor_ruta = ruta_series.idxmax(), ruta_series.idxmin()
         
         st.markdown("#### Análisis por Ruta")
         col1, col2 = st.columns(2)
         with col1:
-            st.success(f"**Mejor ruta:** {mejor_ruta['ruta']} ({mejor_ruta[columna]:.1f}%)")
+            st.success(f"**Mejor ruta:** {mejor_ruta} ({ruta_series[mejor_ruta]:.1f}%)")
         with col2:
-            st.warning(f"**Ruta con desafíos:** {peor_ruta['ruta']} ({peor_ruta[columna]:.1f}%)")
+            st.warning(f"**Ruta con desafíos:** {peor_ruta} ({ruta_series[peor_ruta]:.1f}%)")
     
     # Recomendación
     st.info(f"**Recomendación:** {recomendacion}")
 
+# Secciones de detalle: (columna, título de sección, tipo de gráfico, título del gráfico)
+DETALLES_INDICADORES = [
+    ('vehiculo_limpio_buen_estado', 'Limpieza y Estado del Vehículo', 'barras', 'Vehículos Limpios y en Buen Estado'),
+    ('alimentos_de_calidad_cantidad', 'Calidad y Cantidad de Alimentos', 'barras', 'Alimentos de Calidad y Cantidad Adecuada'),
+    ('contenedores_para_cada_tipoalimento', 'Uso de Contenedores Adecuados', 'pastel', 'Uso de Contenedores Adecuados'),
+]
+
+# Detalle de un indicador: gráfico Sí/No y análisis en dos columnas
+def mostrar_detalle_indicador(df, columna, titulo_seccion, tipo_grafico, titulo_grafico, conteo, valor_positivo, ruta_series):
+    st.markdown(f'<h3 class="comparison-title">{titulo_seccion}</h3>', unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        crear_grafico = crear_grafico_barras if tipo_grafico == 'barras' else crear_grafico_pastel
+        st.plotly_chart(crear_grafico(conteo, titulo_grafico), use_container_width=True)
+    
+    with col2:
+        # Usar componentes nativos de Streamlit para el análisis
+        with st.container():
+            st.subheader("Análisis")
+            generar_analisis_streamlit(df, columna, titulo_seccion, valor_positivo, ruta_series)
+
+# Análisis por vehículo: calificación general y mejor/peor vehículo
+def mostrar_analisis_por_vehiculo(df, huella, columnas_existentes):
+    st.markdown('<h2 class="section-header">Análisis por Vehículo</h2>', unsafe_allow_html=True)
+    
+    resultado_vehiculo = analisis_por_vehiculo_cacheado(huella, tuple(columnas_existentes), df)
+    
+    if resultado_vehiculo:
+        fig, df_vehiculos = resultado_vehiculo
+        
+        # Mostrar gráfico
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Identificar mejores y peores vehículos
+        if len(df_vehiculos) > 1:
+            mejor_vehiculo = df_vehiculos.iloc[0]
+            peor_vehiculo = df_vehiculos.iloc[-1]
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.success(f"### Mejor Vehículo\n"
+                           f"**Placa:** {mejor_vehiculo['placa_vehiculo']}\n\n"
+                           f"**Calificación:** {mejor_vehiculo['promedio_general']:.2f}%")
+            
+            with col2:
+                st.warning(f"### Vehículo con Oportunidades de Mejora\n"
+                           f"**Placa:** {peor_vehiculo['placa_vehiculo']}\n\n"
+                           f"**Calificación:** {peor_vehiculo['promedio_general']:.2f}%")
+    else:
+        st.warning("No hay suficientes datos para realizar un análisis por vehículo.")
+
 def main():
     # Título de la página
     st.markdown('<h1 class="page-title">Análisis de Condiciones del Vehículo</h1>', unsafe_allow_html=True)
     
     # Cargar datos
-    df = get_data()
+    df, huella = get_data()
     
     # Descripción del análisis
     st.info("Esta sección analiza las condiciones de los vehículos que realizan las entregas de insumos alimentarios. "
@@ -178,6 +235,9 @@ def main():
         st.error("No hay datos disponibles para analizar. Por favor, verifica la conexión con la fuente de datos.")
         return
     
+    # Conjunto de columnas para las comprobaciones de presencia
+    cols = frozenset(df.columns)
+    
     # Columnas de vehículo que vamos a analizar
     columnas_vehiculo = [
         'vehiculo_limpio_buen_estado',
@@ -186,12 +246,17 @@ def main():
     ]
     
     # Verificar que existen las columnas necesarias
-    columnas_existentes = [col for col in columnas_vehiculo if col in df.columns]
+    columnas_existentes = [col for col in columnas_vehiculo if col in cols]
     
     if not columnas_existentes:
         st.error("No se encontraron las columnas de condiciones del vehículo en los datos.")
         return
     
+    # Conteos Sí/No y porcentajes de cada indicador (una sola reducción, reutilizada en toda la página)
+    n, sumas, ruta_means = agregados_indicadores(huella, tuple(columnas_existentes), df)
+    conteos = {col: np.array([int(sumas[col]), n - int(sumas[col])]) for col in columnas_existentes}
+    pcts = sumas.div(n).mul(100).round(2).reindex(columnas_vehiculo, fill_value=0).to_dict()
+    
     # Sección de Indicadores Clave
     st.markdown('<h2 class="section-header">Indicadores Clave de Condiciones del Vehículo</h2>', unsafe_allow_html=True)
     
@@ -200,8 +265,8 @@ def main():
     
     # Mostrar métricas con componente nativo de Streamlit
     with col1:
-        if 'vehiculo_limpio_buen_estado' in df.columns:
-            pct_vehiculo_limpio = calcular_porcentaje(df, 'vehiculo_limpio_buen_estado')
+        if 'vehiculo_limpio_buen_estado' in cols:
+            pct_vehiculo_limpio = pcts['vehiculo_limpio_buen_estado']
             st.metric(
                 label="Vehículos Limpios y en Buen Estado",
                 value=f"{pct_vehiculo_limpio}%",
@@ -212,8 +277,8 @@ def main():
             st.warning("No hay datos sobre limpieza y estado de vehículos")
     
     with col2:
-        if 'alimentos_de_calidad_cantidad' in df.columns:
-            pct_alimentos_calidad = calcular_porcentaje(df, 'alimentos_de_calidad_cantidad')
+        if 'alimentos_de_calidad_cantidad' in cols:
+            pct_alimentos_calidad = pcts['alimentos_de_calidad_cantidad']
             st.metric(
                 label="Alimentos de Calidad y Cantidad",
                 value=f"{pct_alimentos_calidad}%",
@@ -224,8 +289,8 @@ def main():
             st.warning("No hay datos sobre calidad y cantidad de alimentos")
     
     with col3:
-        if 'contenedores_para_cada_tipoalimento' in df.columns:
-            pct_contenedores = calcular_porcentaje(df, 'contenedores_para_cada_tipoalimento')
+        if 'contenedores_para_cada_tipoalimento' in cols:
+            pct_contenedores = pcts['contenedores_para_cada_tipoalimento']
             st.metric(
                 label="Uso de Contenedores Adecuados",
                 value=f"{pct_contenedores}%",
@@ -237,7 +302,7 @@ def main():
     
     # Índice general de calidad del vehículo
     if columnas_existentes:
-        valores_promedio = [calcular_porcentaje(df, col) for col in columnas_existentes]
+        valores_promedio = [pcts[col] for col in columnas_existentes]
         indice_general = round(sum(valores_promedio) / len(valores_promedio), 2)
         
         st.markdown("### Índice General de Calidad del Vehículo")
@@ -256,127 +321,37 @@ def main():
     # Análisis Detallado de Cada Indicador
     st.markdown('<h2 class="section-header">Análisis Detallado de Cada Indicador</h2>', unsafe_allow_html=True)
     
-    # Limpieza y Estado del Vehículo
-    if 'vehiculo_limpio_buen_estado' in df.columns:
-        st.markdown('<h3 class="comparison-title">Limpieza y Estado del Vehículo</h3>', unsafe_allow_html=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig = crear_grafico_barras(
-                df,
-                'vehiculo_limpio_buen_estado',
-                'Vehículos Limpios y en Buen Estado'
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            # Usar componentes nativos de Streamlit para el análisis
-            with st.container():
-                st.subheader("Análisis")
-                generar_analisis_streamlit(
-                    df, 
-                    'vehiculo_limpio_buen_estado',
-                    'Limpieza y Estado del Vehículo'
-                )
-    
-    # Calidad y Cantidad de Alimentos
-    if 'alimentos_de_calidad_cantidad' in df.columns:
-        st.markdown('<h3 class="comparison-title">Calidad y Cantidad de Alimentos</h3>', unsafe_allow_html=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig = crear_grafico_barras(
-                df,
-                'alimentos_de_calidad_cantidad',
-                'Alimentos de Calidad y Cantidad Adecuada'
+    # Una sección de detalle por indicador presente
+    for columna, titulo_seccion, tipo_grafico, titulo_grafico in DETALLES_INDICADORES:
+        if columna in cols:
+            mostrar_detalle_indicador(
+                df, columna, titulo_seccion, tipo_grafico, titulo_grafico,
+                conteos[columna], pcts[columna],
+                ruta_means[columna] if ruta_means is not None else None
             )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            # Usar componentes nativos de Streamlit para el análisis
-            with st.container():
-                st.subheader("Análisis")
-                generar_analisis_streamlit(
-                    df, 
-                    'alimentos_de_calidad_cantidad',
-                    'Calidad y Cantidad de Alimentos'
-                )
-    
-    # Uso de Contenedores Adecuados
-    if 'contenedores_para_cada_tipoalimento' in df.columns:
-        st.markdown('<h3 class="comparison-title">Uso de Contenedores Adecuados</h3>', unsafe_allow_html=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig = crear_grafico_pastel(
-                df,
-                'contenedores_para_cada_tipoalimento',
-                'Uso de Contenedores Adecuados'
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            # Usar componentes nativos de Streamlit para el análisis
-            with st.container():
-                st.subheader("Análisis")
-                generar_analisis_streamlit(
-                    df, 
-                    'contenedores_para_cada_tipoalimento',
-                    'Uso de Contenedores Adecuados'
-                )
     
     # Análisis por Vehículo
-    if 'placa_vehiculo' in df.columns and columnas_existentes:
-        st.markdown('<h2 class="section-header">Análisis por Vehículo</h2>', unsafe_allow_html=True)
-        
-        resultado_vehiculo = crear_analisis_por_vehiculo(df)
-        
-        if resultado_vehiculo:
-            fig, df_vehiculos = resultado_vehiculo
-            
-            # Mostrar gráfico
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Identificar mejores y peores vehículos
-            if len(df_vehiculos) > 1:
-                mejor_vehiculo = df_vehiculos.iloc[0]
-                peor_vehiculo = df_vehiculos.iloc[-1]
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.success(f"### Mejor Vehículo\n"
-                               f"**Placa:** {mejor_vehiculo['placa_vehiculo']}\n\n"
-                               f"**Calificación:** {mejor_vehiculo['promedio_general']:.2f}%")
-                
-                with col2:
-                    st.warning(f"### Vehículo con Oportunidades de Mejora\n"
-                               f"**Placa:** {peor_vehiculo['placa_vehiculo']}\n\n"
-                               f"**Calificación:** {peor_vehiculo['promedio_general']:.2f}%")
-        else:
-            st.warning("No hay suficientes datos para realizar un análisis por vehículo.")
+    if 'placa_vehiculo' in cols and columnas_existentes:
+        mostrar_analisis_por_vehiculo(df, huella, columnas_existentes)
     
     # Conclusiones y Recomendaciones
     st.markdown('<h2 class="section-header">Conclusiones y Recomendaciones</h2>', unsafe_allow_html=True)
     
     # Calcular indicadores clave para conclusiones
-    pct_vehiculo_limpio = calcular_porcentaje(df, 'vehiculo_limpio_buen_estado') if 'vehiculo_limpio_buen_estado' in df.columns else 0
-    pct_alimentos_calidad = calcular_porcentaje(df, 'alimentos_de_calidad_cantidad') if 'alimentos_de_calidad_cantidad' in df.columns else 0
-    pct_contenedores = calcular_porcentaje(df, 'contenedores_para_cada_tipoalimento') if 'contenedores_para_cada_tipoalimento' in df.columns else 0
+    pct_vehiculo_limpio = pcts['vehiculo_limpio_buen_estado']
+    pct_alimentos_calidad = pcts['alimentos_de_calidad_cantidad']
+    pct_contenedores = pcts['contenedores_para_cada_tipoalimento']
     
     # Generar conclusiones basadas en los indicadores
     conclusiones = []
     
-    if pct_vehiculo_limpio < 90 and 'vehiculo_limpio_buen_estado' in df.columns:
+    if pct_vehiculo_limpio < 90 and 'vehiculo_limpio_buen_estado' in cols:
         conclusiones.append(f"El {100-pct_vehiculo_limpio:.1f}% de los vehículos no cumplen con los estándares de limpieza y buen estado, lo que podría afectar la inocuidad de los alimentos.")
     
-    if pct_alimentos_calidad < 95 and 'alimentos_de_calidad_cantidad' in df.columns:
+    if pct_alimentos_calidad < 95 and 'alimentos_de_calidad_cantidad' in cols:
         conclusiones.append(f"En el {100-pct_alimentos_calidad:.1f}% de las entregas, los alimentos no llegan con la calidad o cantidad programada, lo que podría generar insatisfacción en los comedores comunitarios.")
     
-    if pct_contenedores < 90 and 'contenedores_para_cada_tipoalimento' in df.columns:
+    if pct_contenedores < 90 and 'contenedores_para_cada_tipoalimento' in cols:
         conclusiones.append(f"En el {100-pct_contenedores:.1f}% de las entregas no se utilizan contenedores adecuados para cada tipo de alimento, lo que podría comprometer la calidad e inocuidad de los mismos.")
     
     # Mostrar conclusiones
@@ -392,13 +367,13 @@ def main():
     # Generar recomendaciones
     recomendaciones = []
     
-    if pct_vehiculo_limpio < 90 and 'vehiculo_limpio_buen_estado' in df.columns:
+    if pct_vehiculo_limpio < 90 and 'vehiculo_limpio_buen_estado' in cols:
         recomendaciones.append("Implementar un protocolo de verificación de limpieza y estado del vehículo antes de cada jornada de entrega.")
     
-    if pct_alimentos_calidad < 95 and 'alimentos_de_calidad_cantidad' in df.columns:
+    if pct_alimentos_calidad < 95 and 'alimentos_de_calidad_cantidad' in cols:
         recomendaciones.append("Reforzar los procesos de control de calidad de los alimentos antes de cargarlos en los vehículos.")
     
-    if pct_contenedores < 90 and 'contenedores_para_cada_tipoalimento' in df.columns:
+    if pct_contenedores < 90 and 'contenedores_para_cada_tipoalimento' in cols:
         recomendaciones.append("Estandarizar el uso de contenedores específicos para cada tipo de alimento, con un sistema de etiquetado claro.")
     
     # Mostrar recomendaciones con componentes nativos
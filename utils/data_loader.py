@@ -1,60 +1,110 @@
 import pandas as pd
 import numpy as np
 import os
+import hashlib
 import streamlit as st
 from datetime import datetime
+from pathlib import Path
 
 # Importaciones para Google Sheets
 try:
-    from oauth2client.service_account import ServiceAccountCredentials
+    from google.oauth2.service_account import Credentials
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     import gspread
     GSPREAD_AVAILABLE = True
 except ImportError:
     GSPREAD_AVAILABLE = False
 
-# Decorador de cache para la función de carga de datos
-@st.cache_data(ttl=600) # Cache por 10 minutos
-def load_data_from_sheets(spreadsheet_name="VERCOAL", 
-                          worksheet_name="VERCOAL",
-                          spreadsheet_id="1NybdSsOvzcIt5m_jG34spuMKWQOOoYwstrhNM6Zwhfw", # NUEVO: ID de la hoja de cálculo
-                          credentials_path=None):
+# Respuestas Sí/No reconocidas (en mayúsculas) y su valor 0/1
+VALORES_SI_NO = {
+    'SI': 1, 'NO': 0, 'S': 1, 'N': 0,
+    'TRUE': 1, 'FALSE': 0, 'VERDADERO': 1, 'FALSO': 0,
+    'NAN': 0, '': 0, '1': 1, '0': 0
+}
+
+def normalizar_si_no(serie):
     """
-    Carga datos desde una hoja de Google Sheets.
-    Intenta abrir por ID si se proporciona, de lo contrario por nombre.
+    Convierte una columna de texto Sí/No a 0/1.
+    
+    Las cadenas se pasan a mayúsculas y se buscan solo sobre los valores únicos
+    (factorize), y el resultado se expande con un índice NumPy sobre los códigos.
+    
+    Args:
+        serie (pandas.Series o numpy.ndarray): Valores de tipo object con respuestas Sí/No.
+    
+    Returns:
+        numpy.ndarray: Arreglo int8 con 1 para Sí y 0 para No o valores no reconocidos.
+    """
+    codigos, unicos = pd.factorize(serie)
+    tabla = pd.Index(unicos.astype(str)).str.upper().map(VALORES_SI_NO).to_numpy(dtype=float)
+    # La última posición atiende los faltantes (código -1)
+    tabla = np.append(np.nan_to_num(tabla, nan=0), 0).astype(np.int8)
+    return tabla[codigos]
+
+# Columnas de texto con un orden natural conocido (se guardan como categóricas ordenadas)
+ORDEN_CATEGORIAS = {
+    'tiempo_entrega': ['Menos de media hora', 'Entre media y una hora', 'Más de una hora'],
+    'dia_entrega': ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+}
+
+# Copia en disco (Feather) de los datos preprocesados: sobrevive reinicios del proceso
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+
+# Versión del formato de los datos preprocesados: incrementarla al cambiar preprocess_data
+# para que las copias en disco con el formato anterior dejen de usarse
+VERSION_ESQUEMA = 1
+
+def ruta_cache_disco(spreadsheet_id, worksheet_name, revision):
+    """
+    Construye la ruta del archivo en disco para una revisión de la hoja.
+    
+    Args:
+        spreadsheet_id (str): ID de la hoja de cálculo.
+        worksheet_name (str): Nombre de la pestaña.
+        revision (str): Marca de última modificación reportada por Drive.
+    
+    Returns:
+        tuple: (Path del archivo, prefijo común a todas las revisiones de la pestaña).
+    """
+    prefijo = hashlib.sha1(f"{spreadsheet_id}/{worksheet_name}".encode()).hexdigest()[:12]
+    sufijo = hashlib.sha1(f"{VERSION_ESQUEMA}/{revision}".encode()).hexdigest()[:12]
+    return CACHE_DIR / f"{prefijo}_{sufijo}.feather", prefijo
+
+# Cliente autorizado compartido por el proceso: la lectura de credenciales y la
+# autorización solo se repiten si cambia la fuente de credenciales
+@st.cache_resource(show_spinner=False)
+def autorizar_cliente_sheets(credentials_env=None, credentials_path=None):
+    """
+    Obtiene un cliente de gspread autorizado con la primera fuente de credenciales disponible.
     Prioriza credenciales en este orden:
     1. Variable de entorno GOOGLE_APPLICATION_CREDENTIALS.
     2. Argumento credentials_path.
     3. Archivo local 'credentials.json'.
     4. Streamlit Secrets (st.secrets).
-    Si todo falla, devuelve un DataFrame vacío.
     
     Args:
-        spreadsheet_name (str): Nombre de la hoja de cálculo (usado si spreadsheet_id no se proporciona o falla).
-        worksheet_name (str): Nombre de la pestaña específica de la hoja.
-        spreadsheet_id (str, optional): ID único de la hoja de cálculo de Google Sheets.
+        credentials_env (str, optional): Valor de GOOGLE_APPLICATION_CREDENTIALS.
         credentials_path (str, optional): Ruta al archivo de credenciales JSON.
     
     Returns:
-        pandas.DataFrame: DataFrame con los datos cargados o un DataFrame vacío si falla.
+        tuple: (cliente de gspread, descripción de la fuente de credenciales usada).
+    
+    Raises:
+        RuntimeError: Si ninguna fuente de credenciales es válida (el fallo no queda en cache).
     """
-    if not GSPREAD_AVAILABLE:
-        st.sidebar.error("Bibliotecas de Google Sheets no disponibles. No se pueden cargar datos.")
-        return pd.DataFrame()
-
     credentials = None
     creds_source = "ninguna fuente conocida"
     scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
 
-    # Lógica de carga de credenciales (sin cambios respecto a la versión anterior)
     # 1. Intentar con la variable de entorno
-    if 'GOOGLE_APPLICATION_CREDENTIALS' in os.environ:
+    if credentials_env:
         try:
-            credentials_file = os.environ['GOOGLE_APPLICATION_CREDENTIALS']
-            if os.path.exists(credentials_file):
-                credentials = ServiceAccountCredentials.from_json_keyfile_name(credentials_file, scope)
+            if os.path.exists(credentials_env):
+                credentials = Credentials.from_service_account_file(credentials_env, scopes=scope)
                 creds_source = "Variables de Entorno (GOOGLE_APPLICATION_CREDENTIALS)"
             else:
-                st.sidebar.warning(f"Archivo de credenciales de entorno no encontrado en: {credentials_file}")
+                st.sidebar.warning(f"Archivo de credenciales de entorno no encontrado en: {credentials_env}")
         except Exception as e:
             st.sidebar.warning(f"Error al cargar credenciales desde variable de entorno: {e}")
             credentials = None
@@ -63,7 +113,7 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
     if not credentials and credentials_path:
         if os.path.exists(credentials_path):
             try:
-                credentials = ServiceAccountCredentials.from_json_keyfile_name(credentials_path, scope)
+                credentials = Credentials.from_service_account_file(credentials_path, scopes=scope)
                 creds_source = f"Ruta de Archivo Proporcionada ({credentials_path})"
             except Exception as e:
                 st.sidebar.warning(f"Error al cargar credenciales desde ruta '{credentials_path}': {e}")
@@ -76,7 +126,7 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
         local_credentials_file = 'credentials.json'
         if os.path.exists(local_credentials_file):
             try:
-                credentials = ServiceAccountCredentials.from_json_keyfile_name(local_credentials_file, scope)
+                credentials = Credentials.from_service_account_file(local_credentials_file, scopes=scope)
                 creds_source = f"Archivo Local ({local_credentials_file})"
             except Exception as e:
                 st.sidebar.warning(f"Error al cargar credenciales desde '{local_credentials_file}' local: {e}")
@@ -87,20 +137,62 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
         try:
             gcp_creds_dict = st.secrets.get("gcp_service_account")
             if gcp_creds_dict: 
-                credentials = ServiceAccountCredentials.from_json_keyfile_dict(gcp_creds_dict, scope)
+                credentials = Credentials.from_service_account_info(dict(gcp_creds_dict), scopes=scope)
                 creds_source = "Streamlit Secrets (gcp_service_account)"
         except Exception as e: 
             st.sidebar.warning(f"No se pudieron usar Streamlit Secrets o no están configurados: {e}")
             credentials = None
 
     if not credentials:
-        st.sidebar.error("No se pudieron cargar las credenciales de Google Sheets desde ninguna fuente.")
+        raise RuntimeError("No se pudieron cargar las credenciales de Google Sheets desde ninguna fuente.")
+
+    client = gspread.authorize(credentials)
+
+    # Sesión con conexiones reutilizables y reintentos ante cuota excedida o fallos transitorios
+    reintentos = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 503),
+                       allowed_methods=frozenset({'GET'}), raise_on_status=False)
+    client.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=reintentos))
+    return client, creds_source
+
+# Decorador de cache para la función de carga de datos
+@st.cache_data(ttl=600, show_spinner=False) # Cache por 10 minutos
+def load_data_from_sheets(spreadsheet_name="VERCOAL", 
+                          worksheet_name="VERCOAL",
+                          spreadsheet_id="1NybdSsOvzcIt5m_jG34spuMKWQOOoYwstrhNM6Zwhfw", # NUEVO: ID de la hoja de cálculo
+                          credentials_path=None):
+    """
+    Carga datos desde una hoja de Google Sheets.
+    Intenta abrir por ID si se proporciona, de lo contrario por nombre.
+    Las credenciales y el cliente se resuelven en autorizar_cliente_sheets.
+    Si todo falla, devuelve un DataFrame vacío.
+    
+    Args:
+        spreadsheet_name (str): Nombre de la hoja de cálculo (usado si spreadsheet_id no se proporciona o falla).
+        worksheet_name (str): Nombre de la pestaña específica de la hoja.
+        spreadsheet_id (str, optional): ID único de la hoja de cálculo de Google Sheets.
+        credentials_path (str, optional): Ruta al archivo de credenciales JSON.
+    
+    Returns:
+        pandas.DataFrame: DataFrame con los datos cargados o un DataFrame vacío si falla.
+    """
+    if not GSPREAD_AVAILABLE:
+        st.sidebar.error("Bibliotecas de Google Sheets no disponibles. No se pueden cargar datos.")
+        return pd.DataFrame()
+
+    try:
+        client, creds_source = autorizar_cliente_sheets(
+            os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'), credentials_path
+        )
+    except Exception as e_creds:
+        st.sidebar.error(str(e_creds))
         st.sidebar.warning("La aplicación no podrá mostrar datos.")
         return pd.DataFrame()
 
+    # Mensajes de progreso: se muestran juntos en un solo bloque plegable al terminar
+    # (los avisos y errores siguen apareciendo por separado)
+    estado = [f"Usando credenciales de: {creds_source}"]
+
     try:
-        st.sidebar.info(f"Usando credenciales de: {creds_source}")
-        client = gspread.authorize(credentials)
         spreadsheet = None
         method_used = ""
 
@@ -109,7 +201,7 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
             try:
                 spreadsheet = client.open_by_key(spreadsheet_id)
                 method_used = f"ID ({spreadsheet_id})"
-                st.sidebar.info(f"Intentando abrir hoja de cálculo por ID: {spreadsheet_id}")
+                estado.append(f"Intentando abrir hoja de cálculo por ID: {spreadsheet_id}")
             except gspread.exceptions.APIError as e_id:
                 st.sidebar.warning(f"Error al abrir por ID '{spreadsheet_id}': {e_id}. Intentando por nombre...")
                 spreadsheet = None # Asegurar que spreadsheet es None para intentar por nombre
@@ -121,7 +213,7 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
         # Si falla abrir por ID o no se proporcionó ID, intentar por nombre
         if not spreadsheet and spreadsheet_name:
             try:
-                st.sidebar.info(f"Intentando abrir hoja de cálculo por nombre: {spreadsheet_name}")
+                estado.append(f"Intentando abrir hoja de cálculo por nombre: {spreadsheet_name}")
                 spreadsheet = client.open(spreadsheet_name)
                 method_used = f"nombre ({spreadsheet_name})"
             except gspread.exceptions.SpreadsheetNotFound as e_name:
@@ -138,21 +230,62 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
             st.sidebar.error("No se pudo abrir la hoja de cálculo ni por ID ni por nombre.")
             return pd.DataFrame()
 
-        st.sidebar.info(f"Hoja de cálculo abierta exitosamente usando: {method_used}")
-        worksheet = spreadsheet.worksheet(worksheet_name)
-        data = worksheet.get_all_records()
+        estado.append(f"Hoja de cálculo abierta exitosamente usando: {method_used}")
+
+        # Si la hoja no cambió desde la última lectura, usar la copia en disco
+        ruta_cache = None
+        try:
+            ruta_cache, prefijo_cache = ruta_cache_disco(spreadsheet.id, worksheet_name, spreadsheet.lastUpdateTime)
+            if ruta_cache.exists():
+                df = pd.read_feather(ruta_cache)
+                df.attrs['huella_carga'] = huella_datos(df)
+                estado.append("✅ Datos cargados desde la copia local (la hoja no ha cambiado).")
+                return df
+        except Exception as e_cache:
+            st.sidebar.warning(f"No se pudo usar la copia local de los datos: {e_cache}")
+
+        # Una sola lectura de valores por nombre de pestaña, sin pedir antes sus metadatos:
+        # números y casillas llegan como escalares nativos, las fechas como texto con el formato de la celda
+        try:
+            respuesta = spreadsheet.values_get(
+                gspread.utils.absolute_range_name(worksheet_name),
+                params={'valueRenderOption': 'UNFORMATTED_VALUE', 'dateTimeRenderOption': 'FORMATTED_STRING'}
+            )
+        except gspread.exceptions.APIError as e_rango:
+            # La API responde 'Unable to parse range' cuando la pestaña no existe
+            if 'Unable to parse range' in str(e_rango):
+                raise gspread.exceptions.WorksheetNotFound(worksheet_name) from e_rango
+            raise
+        values = respuesta.get('values', [])
 
-        if not data:
+        if len(values) < 2:
             st.sidebar.warning(f"No se encontraron datos en la hoja '{worksheet_name}' del libro '{spreadsheet.title}'.")
             return pd.DataFrame()
 
-        df = pd.DataFrame(data)
+        # La API omite las celdas vacías al final de cada fila: se rellenan hasta la fila más ancha
+        values = gspread.utils.fill_gaps(values)
+
+        # Primera fila como encabezado; el resto se construye en bloque sin diccionarios por fila
+        df = pd.DataFrame(values[1:], columns=values[0])
         df = preprocess_data(df)
+        # Huella del contenido: una sola vez por lectura (ver huella_carga)
+        df.attrs['huella_carga'] = huella_datos(df)
+
+        # Guardar la revisión leída y descartar las anteriores de la misma pestaña
+        if ruta_cache is not None and not df.empty:
+            try:
+                CACHE_DIR.mkdir(exist_ok=True)
+                for anterior in CACHE_DIR.glob(f"{prefijo_cache}_*.feather"):
+                    anterior.unlink()
+                df.reset_index(drop=True).to_feather(ruta_cache, compression='lz4')
+            except Exception as e_cache:
+                # Arrow rechaza columnas de texto con tipos mezclados: se sigue sin copia en disco
+                st.sidebar.warning(f"No se pudo guardar la copia local de los datos: {e_cache}")
         
-        if df.empty and data:
+        if df.empty:
             st.sidebar.warning("Los datos se cargaron pero resultaron vacíos después del preprocesamiento.")
         elif not df.empty:
-            st.sidebar.success("✅ Datos cargados y preprocesados correctamente desde Google Sheets.")
+            estado.append("✅ Datos cargados y preprocesados correctamente desde Google Sheets.")
         return df
 
     except gspread.exceptions.WorksheetNotFound:
@@ -165,6 +298,9 @@ def load_data_from_sheets(spreadsheet_name="VERCOAL",
         st.sidebar.error(f"⚠️ Error general al conectar/leer Google Sheets (usando {creds_source}): {str(e_general)}")
         st.sidebar.warning("La aplicación no podrá mostrar datos.")
         return pd.DataFrame()
+    finally:
+        with st.sidebar.expander("Estado de carga de datos"):
+            st.markdown("\n".join(f"- {mensaje}" for mensaje in estado))
 
 
 def preprocess_data(df):
@@ -181,8 +317,13 @@ def preprocess_data(df):
     if df.empty:
         return df
 
+    # Alias estables para encabezados de la hoja con espacios internos
+    df = df.rename(columns={'tiempo_de _entrega_de_alimentos': 'tiempo_entrega'})
+    
     if 'fecha' in df.columns:
         df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+        # Ordenar por fecha (NaT al final) para filtrar rangos con searchsorted
+        df = df.sort_values('fecha', kind='mergesort', na_position='last').reset_index(drop=True)
     
     boolean_columns = [
         'comedor_facil_Acceso', 'vehiculo_puede_llegar_a_sitio', 
@@ -195,22 +336,100 @@ def preprocess_data(df):
         'comunicacion_efectiva', 'resolucion_inconvenientes'
     ]
     
-    for col in boolean_columns:
+    # Normalizar Sí/No a 0/1 una sola vez (int8); las páginas solo leen el arreglo.
+    # Las columnas de texto comparten el mapeo: se apilan y se traducen en un solo paso
+    presentes = [col for col in boolean_columns if col in df.columns]
+    de_texto = [col for col in presentes if df[col].dtype == 'object']
+    if de_texto:
+        bloque = normalizar_si_no(df[de_texto].to_numpy().ravel())
+        df[de_texto] = bloque.reshape(len(df), len(de_texto))
+    for col in presentes:
+        if col not in de_texto:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int8')
+    
+    # Columnas de filtro y agrupación de baja cardinalidad como categóricas (categorías ya ordenadas)
+    categorical_columns = ['comuna', 'ruta', 'nodo', 'placa_vehiculo', 'Gestor_principal', 'conductor_auxiliar']
+    for col in categorical_columns:
         if col in df.columns:
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.upper().map({
-                        'SI': 1, 'NO': 0, 'S': 1, 'N': 0, 
-                        'TRUE': 1, 'FALSE': 0, 'VERDADERO': 1, 'FALSO': 0,
-                        'NAN': 0, '': 0 
-                    })
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+            df[col] = df[col].astype('category')
     
+    # Costos en float32; las sumas se acumulan en float64 donde se reportan totales
+    # (con UNFORMATTED_VALUE llegan como números; solo las celdas vacías o de texto pasan a 0)
     monetary_columns = ['valor_trasbordo', 'valor_apoyo']
-    for col in monetary_columns:
+    monetarias = [col for col in monetary_columns if col in df.columns]
+    if monetarias:
+        df[monetarias] = df[monetarias].apply(pd.to_numeric, errors='coerce').fillna(0).astype('float32')
+    
+    # Categorías ordenadas; si aparecen valores fuera del orden conocido se conservan como categoría simple.
+    # Las celdas vacías (o solo con espacios) quedan como faltantes y no cuentan como valor desconocido
+    for col, orden in ORDEN_CATEGORIAS.items():
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            valores = df[col].replace(r'^\s*$', np.nan, regex=True)
+            if set(valores.dropna().unique()).issubset(orden):
+                df[col] = pd.Categorical(valores, categories=orden, ordered=True)
+            else:
+                df[col] = valores.astype('category')
     
-    return df
+    # Consolidar bloques: las columnas int8/float32 reasignadas una a una quedan en un bloque por tipo
+    return df.copy()
 
 # La función generate_sample_data() ha sido eliminada.
+
+def huella_datos(df):
+    """
+    Calcula una huella del contenido de un DataFrame para usarla como clave de caché.
+    
+    A diferencia de los valores de los filtros, la huella cambia cuando cambian los datos
+    (por ejemplo, tras recargar la hoja), así que un resultado cacheado con ella nunca se
+    combina con datos de otra versión.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame a identificar.
+    
+    Returns:
+        str: Huella hexadecimal del contenido (columnas, índice y valores), o None si df es None.
+    """
+    if df is None:
+        return None
+    huella = hashlib.sha1("\x1f".join(map(str, df.columns)).encode())
+    huella.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return huella.hexdigest()
+
+def huella_carga(df):
+    """
+    Devuelve la huella de un DataFrame devuelto por load_data_from_sheets.
+    
+    El cargador la calcula una sola vez por lectura de la hoja y la guarda en
+    df.attrs, así que consultarla no vuelve a recorrer los datos; si falta
+    (DataFrame construido fuera del cargador) se calcula con huella_datos.
+    Solo vale para el DataFrame completo: pandas copia attrs a los DataFrames
+    derivados (por ejemplo, al filtrar), que conservarían la huella de la carga;
+    para una selección de filas se usa huella_filtrada.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame tal como lo devolvió el cargador.
+    
+    Returns:
+        str: Huella hexadecimal del contenido, o None si df es None.
+    """
+    if df is None:
+        return None
+    return df.attrs.get('huella_carga') or huella_datos(df)
+
+def huella_filtrada(df, mascara):
+    """
+    Calcula la huella de las filas seleccionadas de una carga sin volver a recorrer los datos.
+    
+    Combina la huella de la carga (huella_carga) con la máscara de filas empaquetada en
+    bits, de modo que el costo por interacción es de len(df) / 8 bytes y no de todo el contenido.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame completo devuelto por el cargador.
+        mascara (numpy.ndarray): Máscara booleana de filas seleccionadas (una posición por fila de df).
+    
+    Returns:
+        str: Huella hexadecimal de la selección.
+    """
+    huella = hashlib.sha1(huella_carga(df).encode())
+    huella.update(np.packbits(mascara).tobytes())
+    return huella.hexdigest()
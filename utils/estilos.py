@@ -0,0 +1,18 @@
+from pathlib import Path
+import streamlit as st
+
+# Carpeta de recursos estáticos (CSS, imágenes)
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets"
+
+@st.cache_resource(show_spinner=False)
+def cargar_css(nombre_archivo):
+    """
+    Lee una hoja de estilos de la carpeta assets una sola vez por proceso.
+
+    Args:
+        nombre_archivo (str): Nombre del archivo CSS dentro de assets/.
+
+    Returns:
+        str: Contenido del archivo CSS.
+    """
+    return (ASSETS_DIR / nombre_archivo).read_text(encoding="utf-8")
@@ -1,7 +1,110 @@
 import pandas as pd
 import numpy as np
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+def posiciones_fecha(df, start_date=None, end_date=None):
+    """
+    Calcula el tramo de filas [lo, hi) con fecha válida dentro del rango indicado.
+    
+    'fecha' llega ordenada desde preprocess_data (NaT al final), por lo que los
+    límites se obtienen con búsqueda binaria en lugar de comparar fila por fila.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con la columna 'fecha' en formato datetime, ordenada.
+        start_date (datetime, optional): Fecha de inicio del rango.
+        end_date (datetime, optional): Fecha de fin del rango (se incluye el día completo).
+    
+    Returns:
+        tuple: (lo, hi) Posiciones de inicio y fin (exclusiva) del tramo.
+    """
+    fechas = df['fecha'].to_numpy()
+    
+    # Filas sin fecha válida (al final) quedan fuera
+    lo, hi = 0, int(np.searchsorted(fechas, np.datetime64('NaT')))
+    
+    if start_date and end_date:
+        # Asegurar que end_date incluye todo el día
+        inicio = pd.Timestamp(start_date).to_datetime64()
+        fin = (pd.Timestamp(end_date) + timedelta(days=1) - timedelta(seconds=1)).to_datetime64()
+        
+        lo = int(np.searchsorted(fechas[:hi], inicio, side='left'))
+        hi = int(np.searchsorted(fechas[:hi], fin, side='right'))
+    
+    return lo, max(lo, hi)
+
+def mascara_fecha(df, start_date=None, end_date=None):
+    """
+    Calcula la máscara de filas con fecha válida dentro del rango indicado.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con la columna 'fecha' en formato datetime.
+        start_date (datetime, optional): Fecha de inicio del rango.
+        end_date (datetime, optional): Fecha de fin del rango (se incluye el día completo).
+    
+    Returns:
+        numpy.ndarray: Máscara booleana con una posición por fila.
+    """
+    # Sin columna de fecha datetime no se filtra nada
+    if 'fecha' not in df.columns or not pd.api.types.is_datetime64_any_dtype(df['fecha']):
+        return np.ones(len(df), dtype=bool)
+    
+    lo, hi = posiciones_fecha(df, start_date, end_date)
+    mascara = np.zeros(len(df), dtype=bool)
+    mascara[lo:hi] = True
+    return mascara
+
+def mascara_categoria(df, column, values):
+    """
+    Calcula la máscara de filas cuya categoría está entre los valores seleccionados.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame a evaluar.
+        column (str): Nombre de la columna a filtrar.
+        values (list): Lista de valores a incluir.
+    
+    Returns:
+        numpy.ndarray: Máscara booleana con una posición por fila.
+    """
+    # Sin columna, sin valores o con 'Todos' seleccionado no se filtra nada
+    if column not in df.columns or not values or 'Todos' in values or 'Todas' in values:
+        return np.ones(len(df), dtype=bool)
+    
+    return df[column].isin(values).to_numpy()
+
+def mascara_rango(valores, min_val=None, max_val=None):
+    """
+    Calcula la máscara de valores dentro del rango indicado.
+    
+    Args:
+        valores (numpy.ndarray): Valores numéricos de la columna.
+        min_val (numeric, optional): Valor mínimo a incluir.
+        max_val (numeric, optional): Valor máximo a incluir.
+    
+    Returns:
+        numpy.ndarray: Máscara booleana con una posición por valor.
+    """
+    mascara = np.ones(len(valores), dtype=bool)
+    if min_val is not None:
+        mascara &= valores >= min_val
+    if max_val is not None:
+        mascara &= valores <= max_val
+    return mascara
+
+def mascara_booleana(valores, value=None):
+    """
+    Calcula la máscara de valores iguales al valor booleano indicado.
+    
+    Args:
+        valores (numpy.ndarray): Valores 0/1 de la columna.
+        value (bool, optional): Valor a filtrar (True, False o None para ambos).
+    
+    Returns:
+        numpy.ndarray: Máscara booleana con una posición por valor.
+    """
+    if value is None:
+        return np.ones(len(valores), dtype=bool)
+    return valores == value
 
 def apply_date_filter(df, start_date=None, end_date=None):
     """
@@ -15,36 +118,13 @@ def apply_date_filter(df, start_date=None, end_date=None):
     Returns:
         pandas.DataFrame: DataFrame filtrado por fecha.
     """
-    # Verificar que la columna de fecha existe
-    if 'fecha' not in df.columns or df.empty:
-        return df
-    
-    # Asegurar que la columna de fecha es datetime
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-    
-    # Eliminar filas sin fecha válida
-    df = df.dropna(subset=['fecha'])
-    
-    # Si no hay fechas para filtrar o no hay datos, retornar df original
-    if df.empty:
+    # Verificar que la columna de fecha existe y ya viene como datetime desde preprocess_data
+    if 'fecha' not in df.columns or df.empty or not pd.api.types.is_datetime64_any_dtype(df['fecha']):
         return df
     
-    # Aplicar filtro de fecha
-    if start_date and end_date:
-        # Convertir a datetime si es necesario
-        if not isinstance(start_date, datetime):
-            start_date = pd.to_datetime(start_date)
-        if not isinstance(end_date, datetime):
-            end_date = pd.to_datetime(end_date)
-        
-        # Asegurar que end_date incluye todo el día
-        end_date = end_date + timedelta(days=1) - timedelta(seconds=1)
-        
-        # Aplicar filtro
-        df = df[(df['fecha'] >= start_date) & (df['fecha'] <= end_date)]
-    
-    return df
+    # Tramo contiguo de filas: se recorta por posición sin construir máscara
+    lo, hi = posiciones_fecha(df, start_date, end_date)
+    return df.iloc[lo:hi]
 
 def apply_category_filter(df, column, values):
     """
@@ -66,10 +146,7 @@ def apply_category_filter(df, column, values):
     if not values or 'Todos' in values or 'Todas' in values:
         return df
     
-    # Aplicar filtro
-    df = df[df[column].isin(values)]
-    
-    return df
+    return df[mascara_categoria(df, column, values)]
 
 def apply_range_filter(df, column, min_val=None, max_val=None):
     """
@@ -84,25 +161,15 @@ def apply_range_filter(df, column, min_val=None, max_val=None):
     Returns:
         pandas.DataFrame: DataFrame filtrado por rango.
     """
-    # Verificar que la columna existe
-    if column not in df.columns or df.empty:
+    # Verificar que la columna existe y ya viene como numérica desde preprocess_data
+    if column not in df.columns or df.empty or not pd.api.types.is_numeric_dtype(df[column]):
         return df
     
-    # Asegurar que la columna es numérica
-    if not pd.api.types.is_numeric_dtype(df[column]):
-        try:
-            df[column] = pd.to_numeric(df[column], errors='coerce')
-        except:
-            return df
-    
-    # Aplicar filtro de rango
-    if min_val is not None:
-        df = df[df[column] >= min_val]
-    
-    if max_val is not None:
-        df = df[df[column] <= max_val]
+    # Sin límites no se filtra nada
+    if min_val is None and max_val is None:
+        return df
     
-    return df
+    return df[mascara_rango(df[column].to_numpy(), min_val, max_val)]
 
 def apply_boolean_filter(df, column, value=None):
     """
@@ -124,10 +191,7 @@ def apply_boolean_filter(df, column, value=None):
     if value is None:
         return df
     
-    # Aplicar filtro
-    df = df[df[column] == value]
-    
-    return df
+    return df[mascara_booleana(df[column].to_numpy(), value)]
 
 def create_date_filter_widget(df, key_prefix="date"):
     """
@@ -140,14 +204,10 @@ def create_date_filter_widget(df, key_prefix="date"):
     Returns:
         tuple: (start_date, end_date) Fechas seleccionadas.
     """
-    # Verificar que la columna de fecha existe
-    if 'fecha' not in df.columns or df.empty:
+    # Verificar que la columna de fecha existe y ya viene como datetime desde preprocess_data
+    if 'fecha' not in df.columns or df.empty or not pd.api.types.is_datetime64_any_dtype(df['fecha']):
         return None, None
     
-    # Asegurar que la columna de fecha es datetime
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-    
     # Eliminar filas sin fecha válida
     df = df.dropna(subset=['fecha'])
     
@@ -175,6 +235,26 @@ def create_date_filter_widget(df, key_prefix="date"):
     else:
         return None, None
 
+def opciones_filtro(serie):
+    """
+    Obtiene las opciones de un filtro: los valores con al menos una fila.
+    
+    En columnas categóricas se cuentan los códigos con bincount y se devuelven las
+    categorías usadas en el orden del cargador (orden natural en las ordenadas),
+    sin recorrer ni ordenar las cadenas.
+    
+    Args:
+        serie (pandas.Series): Columna de la que se extraen las opciones.
+    
+    Returns:
+        list: Valores presentes, ordenados.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        usadas = np.bincount(codigos[codigos >= 0], minlength=len(serie.cat.categories)) > 0
+        return serie.cat.categories[usadas].tolist()
+    return sorted(serie.dropna().unique().tolist())
+
 def create_category_filter_widget(df, column, label=None, key_prefix="cat", multiselect=True):
     """
     Crea un widget de filtro de categoría para Streamlit.
@@ -193,8 +273,8 @@ def create_category_filter_widget(df, column, label=None, key_prefix="cat", mult
     if column not in df.columns or df.empty:
         return None
     
-    # Obtener categorías únicas
-    categories = sorted(df[column].unique().tolist())
+    # Obtener categorías presentes
+    categories = opciones_filtro(df[column])
     
     # Si no hay categorías, retornar None
     if not categories:
@@ -245,17 +325,10 @@ def create_range_filter_widget(df, column, label=None, key_prefix="range"):
     Returns:
         tuple: (min_val, max_val) Valores mínimo y máximo seleccionados.
     """
-    # Verificar que la columna existe
-    if column not in df.columns or df.empty:
+    # Verificar que la columna existe y ya viene como numérica desde preprocess_data
+    if column not in df.columns or df.empty or not pd.api.types.is_numeric_dtype(df[column]):
         return None, None
     
-    # Asegurar que la columna es numérica
-    if not pd.api.types.is_numeric_dtype(df[column]):
-        try:
-            df[column] = pd.to_numeric(df[column], errors='coerce')
-        except:
-            return None, None
-    
     # Obtener rango de valores
     min_val = float(df[column].min())
     max_val = float(df[column].max())
@@ -320,10 +393,23 @@ def create_boolean_filter_widget(df, column, label=None, key_prefix="bool"):
     else:
         return None
 
+# Filtros de categoría del panel lateral: (columna, etiqueta)
+FILTROS_CATEGORIA = [
+    ('comuna', 'Comuna'),
+    ('ruta', 'Ruta'),
+    ('nodo', 'Nodo'),
+    ('dia_entrega', 'Día de Entrega'),
+    ('conductor_auxiliar', 'Conductor/Auxiliar'),
+    ('tiempo_entrega', 'Tiempo de Entrega'),
+]
+
 def create_all_filters(df):
     """
     Crea todos los filtros relevantes para el DataFrame en Streamlit.
     
+    Los filtros se acumulan en una sola máscara booleana y el DataFrame se
+    recorta una única vez al final.
+    
     Args:
         df (pandas.DataFrame): DataFrame para filtrar.
     
@@ -332,53 +418,28 @@ def create_all_filters(df):
     """
     st.sidebar.title("Filtros")
     
-    filtered_df = df.copy()
+    mascara = np.ones(len(df), dtype=bool)
     
     # Filtro de fecha
-    start_date, end_date = create_date_filter_widget(filtered_df)
+    start_date, end_date = create_date_filter_widget(df)
     if start_date and end_date:
-        filtered_df = apply_date_filter(filtered_df, start_date, end_date)
-    
-    # Filtro de comuna
-    if 'comuna' in df.columns:
-        comuna_selected = create_category_filter_widget(filtered_df, 'comuna', 'Comuna')
-        if comuna_selected:
-            filtered_df = apply_category_filter(filtered_df, 'comuna', comuna_selected)
-    
-    # Filtro de ruta
-    if 'ruta' in df.columns:
-        ruta_selected = create_category_filter_widget(filtered_df, 'ruta', 'Ruta')
-        if ruta_selected:
-            filtered_df = apply_category_filter(filtered_df, 'ruta', ruta_selected)
-    
-    # Filtro de nodo
-    if 'nodo' in df.columns:
-        nodo_selected = create_category_filter_widget(filtered_df, 'nodo', 'Nodo')
-        if nodo_selected:
-            filtered_df = apply_category_filter(filtered_df, 'nodo', nodo_selected)
-    
-    # Filtro de día de entrega
-    if 'dia_entrega' in df.columns:
-        dia_selected = create_category_filter_widget(filtered_df, 'dia_entrega', 'Día de Entrega')
-        if dia_selected:
-            filtered_df = apply_category_filter(filtered_df, 'dia_entrega', dia_selected)
-    
-    # Filtro de conductor
-    if 'conductor_auxiliar' in df.columns:
-        conductor_selected = create_category_filter_widget(filtered_df, 'conductor_auxiliar', 'Conductor/Auxiliar')
-        if conductor_selected:
-            filtered_df = apply_category_filter(filtered_df, 'conductor_auxiliar', conductor_selected)
-    
-    # Filtro de tiempo de entrega
-    if 'tiempo_de_entrega_de_alimentos' in df.columns:
-        tiempo_selected = create_category_filter_widget(filtered_df, 'tiempo_de_entrega_de_alimentos', 'Tiempo de Entrega')
-        if tiempo_selected:
-            filtered_df = apply_category_filter(filtered_df, 'tiempo_de_entrega_de_alimentos', tiempo_selected)
+        mascara &= mascara_fecha(df, start_date, end_date)
+    
+    # Filtros de categoría (las opciones dependen de los filtros anteriores)
+    for column, label in FILTROS_CATEGORIA:
+        if column in df.columns:
+            vista = df if mascara.all() else df.loc[mascara, [column]]
+            selected = create_category_filter_widget(vista, column, label)
+            if selected:
+                mascara &= mascara_categoria(df, column, selected)
     
     # Agregar botón para restablecer filtros
     if st.sidebar.button("Restablecer Filtros"):
         return df
     
+    # Sin filtros activos se devuelve el mismo DataFrame, sin copiarlo
+    filtered_df = df if mascara.all() else df[mascara]
+    
     # Mostrar conteo de registros
     st.sidebar.markdown(f"**Registros filtrados:** {len(filtered_df)}")
     
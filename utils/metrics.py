@@ -1,3 +1,5 @@
+import heapq
+from operator import itemgetter
 import pandas as pd
 import numpy as np
 import streamlit as st
@@ -15,7 +17,29 @@ def calcular_porcentaje(df, columna):
     """
     if columna not in df.columns or df.empty:
         return 0
-    return round((df[columna].sum() / len(df)) * 100, 2)
+    # Las columnas Sí/No ya llegan como 0/1 (int8) desde el cargador: suma directa del arreglo
+    valores = df[columna].to_numpy()
+    acumulador = np.int64 if valores.dtype.kind in 'iub' else np.float64
+    return round(float(valores.sum(dtype=acumulador)) * 100 / valores.size, 2)
+
+def calcular_porcentajes(df, columnas):
+    """
+    Calcula el porcentaje de valores positivos (1) de varias columnas en una sola pasada.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos.
+        columnas (list): Lista de columnas existentes a calcular.
+    
+    Returns:
+        numpy.ndarray: Porcentajes de valores positivos, en el orden de las columnas.
+    """
+    if not columnas or df.empty:
+        return np.zeros(len(columnas))
+    # Una sola reducción por columnas sobre el bloque 0/1 (int8 desde el cargador);
+    # los bloques enteros se suman en int64, sin pasar por float
+    bloque = df[columnas].to_numpy()
+    acumulador = np.int64 if bloque.dtype.kind in 'iub' else np.float64
+    return np.round(bloque.sum(axis=0, dtype=acumulador) / bloque.shape[0] * 100, 2)
 
 def calcular_indice_grupo(df, columnas, pesos=None):
     """
@@ -30,88 +54,142 @@ def calcular_indice_grupo(df, columnas, pesos=None):
     Returns:
         float: Índice compuesto (valor entre 0 y 100).
     """
-    # Verificar que existen las columnas
-    columnas_existentes = [col for col in columnas if col in df.columns]
+    # Verificar que existen las columnas (búsqueda en un frozenset construido una vez)
+    cols = frozenset(df.columns)
+    columnas_existentes = [col for col in columnas if col in cols]
     
     if not columnas_existentes:
         return 0
-    
-    # Si no se proporcionan pesos, asignar el mismo peso a todas las columnas
+
+    # Sin pesos el índice es la media simple del bloque: una sola reducción
     if pesos is None:
-        pesos = [1] * len(columnas_existentes)
-    else:
-        # Asegurar que hay un peso para cada columna existente
-        pesos = pesos[:len(columnas_existentes)]
-        if len(pesos) < len(columnas_existentes):
-            pesos.extend([1] * (len(columnas_existentes) - len(pesos)))
+        if len(df) == 0:
+            return 0
+        return round(float(df[columnas_existentes].to_numpy(np.float64).mean()) * 100, 2)
+
+    pesos = np.asarray(pesos[:len(columnas_existentes)], dtype=float)
     
-    # Normalizar pesos para que sumen 1
-    suma_pesos = sum(pesos)
-    pesos_norm = [p / suma_pesos for p in pesos]
+    # Asegurar que hay un peso para cada columna existente
+    if len(pesos) < len(columnas_existentes):
+        pesos = np.append(pesos, np.ones(len(columnas_existentes) - len(pesos)))
     
-    # Calcular índice ponderado
-    valores = [calcular_porcentaje(df, col) for col in columnas_existentes]
-    indice = sum(v * p for v, p in zip(valores, pesos_norm))
+    # Calcular índice ponderado (pesos normalizados para que sumen 1)
+    valores = calcular_porcentajes(df, columnas_existentes)
+    indice = float(np.dot(valores, pesos / pesos.sum()))
     
     return round(indice, 2)
 
-def calcular_indice_accesibilidad(df):
+# Pesos de las columnas de cada índice (se normalizan sobre las columnas existentes)
+PESOS_ACCESIBILIDAD = {
+    'comedor_facil_Acceso': 1,
+    'vehiculo_puede_llegar_a_sitio': 1
+}
+
+# Columnas negativas de accesibilidad (se invierte su valor)
+PESOS_ACCESIBILIDAD_NEGATIVOS = {
+    'trasbordo': 1,
+    'ingreso_apoyo_comunidad': 1,
+    'demora_entregas': 1,
+    'inocuidad_comprometida': 1
+}
+
+# Damos más importancia a la entrega en día programado
+PESOS_CUMPLIMIENTO = {
+    'entrega_en_dia_programado': 0.6,
+    'alimentos_debidamente_entregados': 0.4
+}
+
+# Damos más importancia a la calidad de los alimentos
+PESOS_VEHICULO = {
+    'vehiculo_limpio_buen_estado': 0.3,
+    'alimentos_de_calidad_cantidad': 0.4,
+    'contenedores_para_cada_tipoalimento': 0.3
+}
+
+# Todos iguales
+PESOS_ACTITUDES = {
+    'actitud_conductor_respetuosa_colaborativa': 1,
+    'actitud_auxiliar_respetuosa_colaborativa': 1,
+    'actitud_gestora_respetuosa_colaborativa': 1,
+    'buena_disposicion_recibir_mercados': 1,
+    'comunicacion_efectiva': 1,
+    'resolucion_inconvenientes': 1
+}
+
+def porcentajes_indicadores(df, columnas):
     """
-    Calcula el índice de accesibilidad.
+    Calcula en una sola pasada los porcentajes de las columnas que existen en el DataFrame.
     
     Args:
         df (pandas.DataFrame): DataFrame con los datos.
+        columnas (iterable): Columnas de interés (las ausentes se omiten).
     
     Returns:
-        float: Índice de accesibilidad (valor entre 0 y 100).
+        dict: Porcentaje de valores positivos por columna existente.
     """
-    columnas = [
-        'comedor_facil_Acceso',
-        'vehiculo_puede_llegar_a_sitio'
-    ]
+    cols = frozenset(df.columns)
+    columnas_existentes = [col for col in columnas if col in cols]
+    return dict(zip(columnas_existentes, calcular_porcentajes(df, columnas_existentes)))
+
+def indice_ponderado(porcentajes, pesos):
+    """
+    Combina porcentajes ya calculados con los pesos de un índice.
     
-    # Columnas negativas (se invierte su valor)
-    columnas_neg = [
-        'trasbordo',
-        'ingreso_apoyo_comunidad',
-        'demora_entregas',
-        'inocuidad_comprometida'
-    ]
+    Args:
+        porcentajes (dict): Porcentaje por columna existente.
+        pesos (dict): Peso por columna del índice.
     
-    # Verificar qué columnas existen
-    columnas_pos_existentes = [col for col in columnas if col in df.columns]
-    columnas_neg_existentes = [col for col in columnas_neg if col in df.columns]
+    Returns:
+        float: Índice ponderado, o None si ninguna columna del índice existe.
+    """
+    columnas = [col for col in pesos if col in porcentajes]
+    if not columnas:
+        return None
     
-    if not columnas_pos_existentes and not columnas_neg_existentes:
-        return 0
+    valores = np.array([porcentajes[col] for col in columnas])
+    w = np.array([pesos[col] for col in columnas], dtype=float)
+    return round(float(np.dot(valores, w / w.sum())), 2)
+
+def indice_accesibilidad(porcentajes):
+    """
+    Calcula el índice de accesibilidad a partir de porcentajes ya calculados.
     
-    # Calcular indicadores positivos
-    if columnas_pos_existentes:
-        indice_pos = calcular_indice_grupo(df, columnas_pos_existentes)
-    else:
-        indice_pos = 0
-    
-    # Calcular indicadores negativos (invertidos)
-    if columnas_neg_existentes:
-        # Para los indicadores negativos, tomamos el complemento (100 - valor)
-        df_neg_inv = df.copy()
-        for col in columnas_neg_existentes:
-            df_neg_inv[col] = 1 - df_neg_inv[col]  # Invertir 0/1
-        
-        indice_neg = calcular_indice_grupo(df_neg_inv, columnas_neg_existentes)
-    else:
-        indice_neg = 0
+    Args:
+        porcentajes (dict): Porcentaje por columna existente.
+    
+    Returns:
+        float: Índice de accesibilidad (valor entre 0 y 100).
+    """
+    indice_pos = indice_ponderado(porcentajes, PESOS_ACCESIBILIDAD)
+    
+    # Para los indicadores negativos, tomamos el complemento (100 - valor)
+    invertidos = {col: 100 - porcentajes[col] for col in PESOS_ACCESIBILIDAD_NEGATIVOS if col in porcentajes}
+    indice_neg = indice_ponderado(invertidos, PESOS_ACCESIBILIDAD_NEGATIVOS)
     
     # Calcular promedio ponderado (damos más peso a los indicadores positivos si ambos existen)
-    if columnas_pos_existentes and columnas_neg_existentes:
+    if indice_pos is not None and indice_neg is not None:
         indice = (indice_pos * 0.6) + (indice_neg * 0.4)
-    elif columnas_pos_existentes:
+    elif indice_pos is not None:
         indice = indice_pos
-    else:
+    elif indice_neg is not None:
         indice = indice_neg
+    else:
+        return 0
     
     return round(indice, 2)
 
+def calcular_indice_accesibilidad(df):
+    """
+    Calcula el índice de accesibilidad.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos.
+    
+    Returns:
+        float: Índice de accesibilidad (valor entre 0 y 100).
+    """
+    return indice_accesibilidad(porcentajes_indicadores(df, [*PESOS_ACCESIBILIDAD, *PESOS_ACCESIBILIDAD_NEGATIVOS]))
+
 def calcular_indice_cumplimiento(df):
     """
     Calcula el índice de cumplimiento en la entrega.
@@ -122,21 +200,7 @@ def calcular_indice_cumplimiento(df):
     Returns:
         float: Índice de cumplimiento (valor entre 0 y 100).
     """
-    columnas = [
-        'entrega_en_dia_programado',
-        'alimentos_debidamente_entregados'
-    ]
-    
-    # Verificar qué columnas existen
-    columnas_existentes = [col for col in columnas if col in df.columns]
-    
-    if not columnas_existentes:
-        return 0
-    
-    # Pesos: damos más importancia a la entrega en día programado
-    pesos = [0.6, 0.4]
-    
-    return calcular_indice_grupo(df, columnas_existentes, pesos)
+    return indice_ponderado(porcentajes_indicadores(df, PESOS_CUMPLIMIENTO), PESOS_CUMPLIMIENTO) or 0
 
 def calcular_indice_vehiculo(df):
     """
@@ -148,22 +212,7 @@ def calcular_indice_vehiculo(df):
     Returns:
         float: Índice de condiciones del vehículo (valor entre 0 y 100).
     """
-    columnas = [
-        'vehiculo_limpio_buen_estado',
-        'alimentos_de_calidad_cantidad',
-        'contenedores_para_cada_tipoalimento'
-    ]
-    
-    # Verificar qué columnas existen
-    columnas_existentes = [col for col in columnas if col in df.columns]
-    
-    if not columnas_existentes:
-        return 0
-    
-    # Pesos: damos más importancia a la calidad de los alimentos
-    pesos = [0.3, 0.4, 0.3]
-    
-    return calcular_indice_grupo(df, columnas_existentes, pesos)
+    return indice_ponderado(porcentajes_indicadores(df, PESOS_VEHICULO), PESOS_VEHICULO) or 0
 
 def calcular_indice_actitudes(df):
     """
@@ -175,42 +224,35 @@ def calcular_indice_actitudes(df):
     Returns:
         float: Índice de condiciones actitudinales (valor entre 0 y 100).
     """
-    columnas = [
-        'actitud_conductor_respetuosa_colaborativa',
-        'actitud_auxiliar_respetuosa_colaborativa',
-        'actitud_gestora_respetuosa_colaborativa',
-        'buena_disposicion_recibir_mercados',
-        'comunicacion_efectiva',
-        'resolucion_inconvenientes'
-    ]
-    
-    # Verificar qué columnas existen
-    columnas_existentes = [col for col in columnas if col in df.columns]
-    
-    if not columnas_existentes:
-        return 0
-    
-    # Pesos: todos iguales por defecto
-    return calcular_indice_grupo(df, columnas_existentes)
+    return indice_ponderado(porcentajes_indicadores(df, PESOS_ACTITUDES), PESOS_ACTITUDES) or 0
 
 def calcular_indice_general(df):
     """
     Calcula el índice general de calidad del servicio.
     
+    Los porcentajes de todos los indicadores se calculan una sola vez y cada
+    índice de grupo se obtiene combinándolos con sus pesos.
+    
     Args:
         df (pandas.DataFrame): DataFrame con los datos.
     
     Returns:
         float: Índice general (valor entre 0 y 100).
     """
+    porcentajes = porcentajes_indicadores(df, [
+        *PESOS_ACCESIBILIDAD, *PESOS_ACCESIBILIDAD_NEGATIVOS,
+        *PESOS_CUMPLIMIENTO, *PESOS_VEHICULO, *PESOS_ACTITUDES
+    ])
+    
     # Calcular índices por grupo
-    indice_accesibilidad = calcular_indice_accesibilidad(df)
-    indice_cumplimiento = calcular_indice_cumplimiento(df)
-    indice_vehiculo = calcular_indice_vehiculo(df)
-    indice_actitudes = calcular_indice_actitudes(df)
+    indices = [
+        indice_accesibilidad(porcentajes),
+        indice_ponderado(porcentajes, PESOS_CUMPLIMIENTO) or 0,
+        indice_ponderado(porcentajes, PESOS_VEHICULO) or 0,
+        indice_ponderado(porcentajes, PESOS_ACTITUDES) or 0
+    ]
     
     # Contar índices con valor (para no afectar el promedio con ceros)
-    indices = [indice_accesibilidad, indice_cumplimiento, indice_vehiculo, indice_actitudes]
     indices_validos = [ind for ind in indices if ind > 0]
     
     if not indices_validos:
@@ -221,7 +263,71 @@ def calcular_indice_general(df):
     
     return round(indice_general, 2)
 
-def identificar_problemas(df, umbral_alerta=80, umbral_critico=70):
+# Columnas de interés por grupo para identificar problemas
+COLUMNAS_POR_GRUPO = {
+    'Accesibilidad': [
+        'comedor_facil_Acceso',
+        'vehiculo_puede_llegar_a_sitio',
+        'trasbordo',
+        'ingreso_apoyo_comunidad',
+        'demora_entregas',
+        'inocuidad_comprometida'
+    ],
+    'Cumplimiento': [
+        'entrega_en_dia_programado',
+        'alimentos_debidamente_entregados'
+    ],
+    'Vehículo': [
+        'vehiculo_limpio_buen_estado',
+        'alimentos_de_calidad_cantidad',
+        'contenedores_para_cada_tipoalimento'
+    ],
+    'Actitudes': [
+        'actitud_conductor_respetuosa_colaborativa',
+        'actitud_auxiliar_respetuosa_colaborativa',
+        'actitud_gestora_respetuosa_colaborativa',
+        'buena_disposicion_recibir_mercados',
+        'comunicacion_efectiva',
+        'resolucion_inconvenientes'
+    ]
+}
+
+# Mapeo de nombres de columnas a nombres más legibles
+NOMBRES_LEGIBLES = {
+    'comedor_facil_Acceso': 'Acceso Fácil al Comedor',
+    'vehiculo_puede_llegar_a_sitio': 'Vehículo Llega Directamente',
+    'trasbordo': 'Necesidad de Trasbordo',
+    'ingreso_apoyo_comunidad': 'Necesidad de Apoyo Comunitario',
+    'demora_entregas': 'Demoras en Otras Entregas',
+    'inocuidad_comprometida': 'Inocuidad Comprometida',
+    'entrega_en_dia_programado': 'Entrega en Día Programado',
+    'alimentos_debidamente_entregados': 'Verificación de Alimentos',
+    'vehiculo_limpio_buen_estado': 'Vehículo Limpio y en Buen Estado',
+    'alimentos_de_calidad_cantidad': 'Calidad y Cantidad de Alimentos',
+    'contenedores_para_cada_tipoalimento': 'Contenedores Adecuados',
+    'actitud_conductor_respetuosa_colaborativa': 'Actitud del Conductor',
+    'actitud_auxiliar_respetuosa_colaborativa': 'Actitud del Auxiliar',
+    'actitud_gestora_respetuosa_colaborativa': 'Actitud de la Gestora',
+    'buena_disposicion_recibir_mercados': 'Disposición para Recibir',
+    'comunicacion_efectiva': 'Comunicación Efectiva',
+    'resolucion_inconvenientes': 'Resolución de Inconvenientes'
+}
+
+# Indicadores que deben invertirse (son negativos)
+INDICADORES_NEGATIVOS = ['trasbordo', 'ingreso_apoyo_comunidad', 'demora_entregas', 'inocuidad_comprometida']
+
+# Nombre mostrado de cada problema (los negativos se reportan como ausencia), armado una vez
+NOMBRES_PROBLEMA = {
+    col: "Ausencia de " + nombre if col in INDICADORES_NEGATIVOS else nombre
+    for col, nombre in NOMBRES_LEGIBLES.items()
+}
+
+# Indicadores de problemas como arreglos paralelos (columna, grupo, negativo), en orden de grupo
+INDICADORES_COLUMNAS = np.array([col for columnas in COLUMNAS_POR_GRUPO.values() for col in columnas])
+INDICADORES_GRUPOS = np.array([grupo for grupo, columnas in COLUMNAS_POR_GRUPO.items() for _ in columnas])
+INDICADORES_NEGATIVO = np.isin(INDICADORES_COLUMNAS, INDICADORES_NEGATIVOS)
+
+def identificar_problemas(df, umbral_alerta=80, umbral_critico=70, top_n=None):
     """
     Identifica problemas en los indicadores.
     
@@ -229,105 +335,69 @@ def identificar_problemas(df, umbral_alerta=80, umbral_critico=70):
         df (pandas.DataFrame): DataFrame con los datos.
         umbral_alerta (int, optional): Umbral para alertas (por debajo de este valor).
         umbral_critico (int, optional): Umbral para problemas críticos (por debajo de este valor).
+        top_n (int, optional): Si se indica, solo se devuelven los top_n peores de cada lista.
     
     Returns:
         tuple: (problemas_criticos, alertas) Listas de diccionarios con los problemas identificados.
     """
-    # Definir todas las columnas de interés por grupo
-    columnas_por_grupo = {
-        'Accesibilidad': [
-            'comedor_facil_Acceso',
-            'vehiculo_puede_llegar_a_sitio',
-            'trasbordo',
-            'ingreso_apoyo_comunidad',
-            'demora_entregas',
-            'inocuidad_comprometida'
-        ],
-        'Cumplimiento': [
-            'entrega_en_dia_programado',
-            'alimentos_debidamente_entregados'
-        ],
-        'Vehículo': [
-            'vehiculo_limpio_buen_estado',
-            'alimentos_de_calidad_cantidad',
-            'contenedores_para_cada_tipoalimento'
-        ],
-        'Actitudes': [
-            'actitud_conductor_respetuosa_colaborativa',
-            'actitud_auxiliar_respetuosa_colaborativa',
-            'actitud_gestora_respetuosa_colaborativa',
-            'buena_disposicion_recibir_mercados',
-            'comunicacion_efectiva',
-            'resolucion_inconvenientes'
-        ]
-    }
-    
-    # Mapeo de nombres de columnas a nombres más legibles
-    nombres_legibles = {
-        'comedor_facil_Acceso': 'Acceso Fácil al Comedor',
-        'vehiculo_puede_llegar_a_sitio': 'Vehículo Llega Directamente',
-        'trasbordo': 'Necesidad de Trasbordo',
-        'ingreso_apoyo_comunidad': 'Necesidad de Apoyo Comunitario',
-        'demora_entregas': 'Demoras en Otras Entregas',
-        'inocuidad_comprometida': 'Inocuidad Comprometida',
-        'entrega_en_dia_programado': 'Entrega en Día Programado',
-        'alimentos_debidamente_entregados': 'Verificación de Alimentos',
-        'vehiculo_limpio_buen_estado': 'Vehículo Limpio y en Buen Estado',
-        'alimentos_de_calidad_cantidad': 'Calidad y Cantidad de Alimentos',
-        'contenedores_para_cada_tipoalimento': 'Contenedores Adecuados',
-        'actitud_conductor_respetuosa_colaborativa': 'Actitud del Conductor',
-        'actitud_auxiliar_respetuosa_colaborativa': 'Actitud del Auxiliar',
-        'actitud_gestora_respetuosa_colaborativa': 'Actitud de la Gestora',
-        'buena_disposicion_recibir_mercados': 'Disposición para Recibir',
-        'comunicacion_efectiva': 'Comunicación Efectiva',
-        'resolucion_inconvenientes': 'Resolución de Inconvenientes'
-    }
-    
-    # Indicadores que deben invertirse (son negativos)
-    indicadores_negativos = ['trasbordo', 'ingreso_apoyo_comunidad', 'demora_entregas', 'inocuidad_comprometida']
-    
-    problemas_criticos = []
-    alertas = []
-    
-    # Analizar cada grupo de indicadores
-    for grupo, columnas in columnas_por_grupo.items():
-        # Verificar qué columnas existen
-        columnas_existentes = [col for col in columnas if col in df.columns]
-        
-        # Analizar cada indicador
-        for col in columnas_existentes:
-            # Calcular valor
-            valor = calcular_porcentaje(df, col)
-            
-            # Para indicadores negativos, invertir el valor
-            if col in indicadores_negativos:
-                valor = 100 - valor
-                nombre = "Ausencia de " + nombres_legibles.get(col, col)
-            else:
-                nombre = nombres_legibles.get(col, col)
-            
-            # Evaluar si es un problema
-            if valor < umbral_critico:
-                problemas_criticos.append({
-                    'grupo': grupo,
-                    'indicador': nombre,
-                    'valor': valor,
-                    'columna': col
-                })
-            elif valor < umbral_alerta:
-                alertas.append({
-                    'grupo': grupo,
-                    'indicador': nombre,
-                    'valor': valor,
-                    'columna': col
-                })
-    
-    # Ordenar por valor ascendente (peores primero)
-    problemas_criticos = sorted(problemas_criticos, key=lambda x: x['valor'])
-    alertas = sorted(alertas, key=lambda x: x['valor'])
+    # Selección de los indicadores existentes sobre los arreglos paralelos
+    cols = frozenset(df.columns)
+    existe = np.array([col in cols for col in INDICADORES_COLUMNAS], dtype=bool)
+    columnas_existentes = INDICADORES_COLUMNAS[existe].tolist()
+    grupos = INDICADORES_GRUPOS[existe].tolist()
+    
+    # Calcular todos los valores en una pasada; para indicadores negativos, invertir el valor
+    valores = calcular_porcentajes(df, columnas_existentes)
+    valores = np.where(INDICADORES_NEGATIVO[existe], 100 - valores, valores)
+    
+    # Evaluar los umbrales de una vez y armar los diccionarios solo de los indicadores con problema
+    def armar(posiciones):
+        return [{
+            'grupo': grupos[i],
+            'indicador': NOMBRES_PROBLEMA.get(columnas_existentes[i], columnas_existentes[i]),
+            'valor': float(valores[i]),
+            'columna': columnas_existentes[i]
+        } for i in posiciones]
+    
+    problemas_criticos = armar(np.flatnonzero(valores < umbral_critico))
+    alertas = armar(np.flatnonzero((valores >= umbral_critico) & (valores < umbral_alerta)))
+    
+    # Ordenar por valor ascendente (peores primero); con top_n basta una selección parcial
+    if top_n is None:
+        problemas_criticos = sorted(problemas_criticos, key=itemgetter('valor'))
+        alertas = sorted(alertas, key=itemgetter('valor'))
+    else:
+        problemas_criticos = heapq.nsmallest(top_n, problemas_criticos, key=itemgetter('valor'))
+        alertas = heapq.nsmallest(top_n, alertas, key=itemgetter('valor'))
     
     return problemas_criticos, alertas
 
+# Recomendación y plazo por indicador; plazo None significa corto plazo si el problema
+# es crítico y mediano plazo si es solo una alerta
+RECOMENDACIONES_POR_INDICADOR = {
+    # Accesibilidad
+    'comedor_facil_Acceso': ("Realizar un estudio detallado de rutas y accesos para mejorar el acceso a los comedores con dificultades.", None),
+    'vehiculo_puede_llegar_a_sitio': ("Realizar un estudio detallado de rutas y accesos para mejorar el acceso a los comedores con dificultades.", None),
+    'trasbordo': ("Evaluar la posibilidad de utilizar vehículos más pequeños para zonas de difícil acceso.", 'mediano_plazo'),
+    'ingreso_apoyo_comunidad': ("Establecer acuerdos formales con líderes comunitarios para facilitar el apoyo en las entregas.", 'mediano_plazo'),
+    'demora_entregas': ("Optimizar la programación de rutas considerando los tiempos adicionales para comedores de difícil acceso.", None),
+    'inocuidad_comprometida': ("Implementar protocolos específicos para preservar la inocuidad de los alimentos en condiciones de trasbordos.", 'corto_plazo'),
+    # Cumplimiento
+    'entrega_en_dia_programado': ("Establecer un sistema de seguimiento en tiempo real para monitorear el cumplimiento de entregas.", None),
+    'alimentos_debidamente_entregados': ("Implementar un sistema digital de verificación de alimentos con listas de chequeo electrónicas.", 'mediano_plazo'),
+    # Vehículo
+    'vehiculo_limpio_buen_estado': ("Establecer un protocolo de verificación de limpieza y estado del vehículo antes de cada jornada.", None),
+    'alimentos_de_calidad_cantidad': ("Reforzar los controles de calidad de alimentos antes de su carga en los vehículos.", 'corto_plazo'),
+    'contenedores_para_cada_tipoalimento': ("Estandarizar el uso de contenedores específicos para cada tipo de alimento con etiquetado claro.", 'mediano_plazo'),
+    # Actitudes
+    'buena_disposicion_recibir_mercados': ("Desarrollar protocolos claros para el proceso de recepción y establecer tiempos estimados para cada etapa.", 'mediano_plazo'),
+    'comunicacion_efectiva': ("Establecer canales de comunicación efectivos y un glosario común para todos los actores involucrados.", 'mediano_plazo'),
+    'resolucion_inconvenientes': ("Implementar un sistema de registro y seguimiento de incidencias para asegurar su resolución.", 'mediano_plazo')
+}
+
+# Recomendación común a todas las columnas de actitud del personal
+RECOMENDACION_ACTITUD = ("Implementar talleres de sensibilización y capacitación en servicio al cliente y trabajo en equipo.", 'mediano_plazo')
+
 def generar_recomendaciones(problemas, alertas):
     """
     Genera recomendaciones basadas en los problemas identificados.
@@ -339,11 +409,12 @@ def generar_recomendaciones(problemas, alertas):
     Returns:
         dict: Diccionario con recomendaciones por categoría y horizonte temporal.
     """
-    # Inicializar estructura para recomendaciones
+    # Inicializar estructura para recomendaciones (dicts como conjuntos ordenados:
+    # los duplicados se descartan al insertar, conservando el primer orden de aparición)
     recomendaciones = {
-        'corto_plazo': [],   # Acción inmediata (1-3 meses)
-        'mediano_plazo': [], # Acción planeada (3-6 meses)
-        'largo_plazo': []    # Mejora continua (6-12 meses)
+        'corto_plazo': {},   # Acción inmediata (1-3 meses)
+        'mediano_plazo': {}, # Acción planeada (3-6 meses)
+        'largo_plazo': {}    # Mejora continua (6-12 meses)
     }
     
     # Recomendaciones específicas según el indicador
@@ -351,123 +422,83 @@ def generar_recomendaciones(problemas, alertas):
         # Combinar problemas y alertas, priorizando problemas
         todos_problemas = problemas + alertas
         
+        # Indicadores con problema crítico (conjunto armado una vez, no por iteración)
+        columnas_criticas = {p['columna'] for p in problemas}
+        
         # Generar recomendaciones específicas por problema
         for problema in todos_problemas:
-            categoria = problema['grupo']
             indicador = problema['columna']
             
-            # Generar recomendación específica según el indicador
-            recomendacion = ""
-            
-            # Accesibilidad
-            if indicador == 'comedor_facil_Acceso' or indicador == 'vehiculo_puede_llegar_a_sitio':
-                recomendacion = f"Realizar un estudio detallado de rutas y accesos para mejorar el acceso a los comedores con dificultades."
-                recomendaciones['corto_plazo'].append(recomendacion) if indicador in [p['columna'] for p in problemas] else recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'trasbordo':
-                recomendacion = f"Evaluar la posibilidad de utilizar vehículos más pequeños para zonas de difícil acceso."
-                recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'ingreso_apoyo_comunidad':
-                recomendacion = f"Establecer acuerdos formales con líderes comunitarios para facilitar el apoyo en las entregas."
-                recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'demora_entregas':
-                recomendacion = f"Optimizar la programación de rutas considerando los tiempos adicionales para comedores de difícil acceso."
-                recomendaciones['corto_plazo'].append(recomendacion) if indicador in [p['columna'] for p in problemas] else recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'inocuidad_comprometida':
-                recomendacion = f"Implementar protocolos específicos para preservar la inocuidad de los alimentos en condiciones de trasbordos."
-                recomendaciones['corto_plazo'].append(recomendacion)
-            
-            # Cumplimiento
-            elif indicador == 'entrega_en_dia_programado':
-                recomendacion = f"Establecer un sistema de seguimiento en tiempo real para monitorear el cumplimiento de entregas."
-                recomendaciones['corto_plazo'].append(recomendacion) if indicador in [p['columna'] for p in problemas] else recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'alimentos_debidamente_entregados':
-                recomendacion = f"Implementar un sistema digital de verificación de alimentos con listas de chequeo electrónicas."
-                recomendaciones['mediano_plazo'].append(recomendacion)
+            # Buscar la recomendación del indicador (las columnas de actitud comparten una)
+            entrada = RECOMENDACIONES_POR_INDICADOR.get(indicador)
+            if entrada is None and 'actitud' in indicador:
+                entrada = RECOMENDACION_ACTITUD
+            if entrada is None:
+                continue
             
-            # Vehículo
-            elif indicador == 'vehiculo_limpio_buen_estado':
-                recomendacion = f"Establecer un protocolo de verificación de limpieza y estado del vehículo antes de cada jornada."
-                recomendaciones['corto_plazo'].append(recomendacion) if indicador in [p['columna'] for p in problemas] else recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'alimentos_de_calidad_cantidad':
-                recomendacion = f"Reforzar los controles de calidad de alimentos antes de su carga en los vehículos."
-                recomendaciones['corto_plazo'].append(recomendacion)
-            
-            elif indicador == 'contenedores_para_cada_tipoalimento':
-                recomendacion = f"Estandarizar el uso de contenedores específicos para cada tipo de alimento con etiquetado claro."
-                recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            # Actitudes
-            elif 'actitud' in indicador:
-                recomendacion = f"Implementar talleres de sensibilización y capacitación en servicio al cliente y trabajo en equipo."
-                recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'buena_disposicion_recibir_mercados':
-                recomendacion = f"Desarrollar protocolos claros para el proceso de recepción y establecer tiempos estimados para cada etapa."
-                recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'comunicacion_efectiva':
-                recomendacion = f"Establecer canales de comunicación efectivos y un glosario común para todos los actores involucrados."
-                recomendaciones['mediano_plazo'].append(recomendacion)
-            
-            elif indicador == 'resolucion_inconvenientes':
-                recomendacion = f"Implementar un sistema de registro y seguimiento de incidencias para asegurar su resolución."
-                recomendaciones['mediano_plazo'].append(recomendacion)
+            # Los indicadores sin plazo fijo van a corto plazo si son críticos, si no a mediano plazo
+            recomendacion, plazo = entrada
+            if plazo is None:
+                plazo = 'corto_plazo' if indicador in columnas_criticas else 'mediano_plazo'
+            recomendaciones[plazo][recomendacion] = None
     
     # Recomendaciones generales de largo plazo (siempre se incluyen)
-    recomendaciones['largo_plazo'] = [
+    recomendaciones['largo_plazo'] = dict.fromkeys([
         "Implementar un sistema integral de monitoreo y evaluación continua del proceso de entrega.",
         "Establecer un programa de capacitación permanente para todo el personal involucrado en el proceso.",
         "Desarrollar un plan de mejora continua con revisiones trimestrales de los indicadores clave."
-    ]
-    
-    # Eliminar duplicados
-    for plazo in recomendaciones:
-        recomendaciones[plazo] = list(dict.fromkeys(recomendaciones[plazo]))
+    ])
     
-    return recomendaciones
+    return {plazo: list(textos) for plazo, textos in recomendaciones.items()}
 
-def analizar_tendencia(df, columna, meses=3):
+def claves_mes_validas(df):
     """
-    Analiza la tendencia de un indicador en los últimos meses.
+    Convierte la columna 'fecha' en claves enteras de mes, una sola vez por DataFrame.
     
     Args:
         df (pandas.DataFrame): DataFrame con los datos.
-        columna (str): Columna a analizar.
-        meses (int, optional): Número de meses a considerar.
     
     Returns:
-        dict: Diccionario con información de la tendencia.
+        tuple: (validas, claves_mes) Máscara de filas con fecha válida y meses desde 1970
+               de esas filas, o None si no hay fechas válidas.
     """
-    # Verificar si existen las columnas necesarias
-    if 'fecha' not in df.columns or columna not in df.columns or df.empty:
-        return None
-    
-    # Convertir a datetime si no lo es ya
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+    # Convertir a datetime si no lo es ya (sobre una copia local, sin modificar df)
+    fechas = df['fecha']
+    if not pd.api.types.is_datetime64_any_dtype(fechas):
+        fechas = pd.to_datetime(fechas, errors='coerce')
     
-    # Filtrar datos sin fecha válida
-    df = df.dropna(subset=['fecha'])
+    # Filtrar datos sin fecha válida con una sola máscara sobre los arreglos
+    fechas = fechas.to_numpy()
+    validas = ~np.isnat(fechas)
     
-    if df.empty:
+    if not validas.any():
         return None
     
-    # Agrupar por mes
-    df['mes'] = df['fecha'].dt.to_period('M')
+    # Agrupar por mes con claves enteras (meses desde 1970) en lugar de objetos Period
+    return validas, fechas[validas].astype('datetime64[M]').astype(np.int64)
+
+def tendencia_columna(df, columna, validas, claves_mes, meses=3):
+    """
+    Calcula la tendencia de una columna a partir de claves de mes ya calculadas.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos.
+        columna (str): Columna a analizar.
+        validas (numpy.ndarray): Máscara de filas con fecha válida.
+        claves_mes (numpy.ndarray): Meses desde 1970 de las filas válidas.
+        meses (int, optional): Número de meses a considerar.
     
-    # Calcular promedio por mes
-    datos_tiempo = df.groupby('mes')[columna].mean().reset_index()
-    datos_tiempo['mes'] = datos_tiempo['mes'].dt.to_timestamp()
-    datos_tiempo[columna] = datos_tiempo[columna] * 100  # Convertir a porcentaje
+    Returns:
+        dict: Diccionario con información de la tendencia.
+    """
+    valores = pd.Series(df[columna].to_numpy()[validas])
     
-    # Ordenar por fecha
-    datos_tiempo = datos_tiempo.sort_values('mes')
+    # Calcular promedio por mes (groupby ordena las claves: meses en orden cronológico)
+    promedios = valores.groupby(claves_mes).mean() * 100  # Convertir a porcentaje
+    datos_tiempo = pd.DataFrame({
+        'mes': promedios.index.to_numpy().astype('datetime64[M]').astype('datetime64[ns]'),
+        columna: promedios.to_numpy()
+    })
     
     # Si no hay suficientes datos para analizar tendencia
     if len(datos_tiempo) < 2:
@@ -501,6 +532,50 @@ def analizar_tendencia(df, columna, meses=3):
         'ultimo_valor': round(ultimo_valor, 2)
     }
 
+def analizar_tendencia(df, columna, meses=3):
+    """
+    Analiza la tendencia de un indicador en los últimos meses.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos.
+        columna (str): Columna a analizar.
+        meses (int, optional): Número de meses a considerar.
+    
+    Returns:
+        dict: Diccionario con información de la tendencia.
+    """
+    # Verificar si existen las columnas necesarias
+    if 'fecha' not in df.columns or columna not in df.columns or df.empty:
+        return None
+    
+    claves = claves_mes_validas(df)
+    if claves is None:
+        return None
+    
+    return tendencia_columna(df, columna, *claves, meses)
+
+def analizar_tendencias(df, columnas, meses=3):
+    """
+    Analiza la tendencia de varios indicadores convirtiendo las fechas una sola vez.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos.
+        columnas (list): Columnas a analizar.
+        meses (int, optional): Número de meses a considerar.
+    
+    Returns:
+        dict: Tendencia de cada columna existente (None si no hay fechas válidas).
+    """
+    if 'fecha' not in df.columns or df.empty:
+        return {}
+    
+    existentes = [col for col in columnas if col in df.columns]
+    claves = claves_mes_validas(df) if existentes else None
+    if claves is None:
+        return dict.fromkeys(existentes)
+    
+    return {col: tendencia_columna(df, col, *claves, meses) for col in existentes}
+
 def identificar_mejores_peores(df, columna_grupo, columnas_indicadores):
     """
     Identifica los mejores y peores elementos por grupo.
@@ -514,38 +589,41 @@ def identificar_mejores_peores(df, columna_grupo, columnas_indicadores):
         tuple: (mejores, peores) Listas con los mejores y peores elementos.
     """
     # Verificar si existen las columnas necesarias
-    if columna_grupo not in df.columns or df.empty:
+    cols = frozenset(df.columns)
+    if columna_grupo not in cols or df.empty:
         return [], []
     
     # Verificar qué columnas de indicadores existen
-    columnas_existentes = [col for col in columnas_indicadores if col in df.columns]
+    columnas_existentes = [col for col in columnas_indicadores if col in cols]
     
     if not columnas_existentes:
         return [], []
     
-    # Crear DataFrame para resultados
-    resultados = pd.DataFrame()
+    # Códigos de grupo (ordenados como en groupby; los faltantes quedan con -1 y se descartan)
+    codigos, grupos = pd.factorize(df[columna_grupo], sort=True)
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    valores = df[columnas_existentes].to_numpy()[validos]
     
-    # Para cada columna, calcular promedio por grupo
-    for col in columnas_existentes:
-        # Agrupar por la columna de grupo y calcular promedio
-        temp = df.groupby(columna_grupo)[col].mean().reset_index()
-        temp[col] = temp[col] * 100  # Convertir a porcentaje
-        
-        # Iniciar o unir con resultados
-        if resultados.empty:
-            resultados = temp
-        else:
-            resultados = resultados.merge(temp, on=columna_grupo)
+    # Promedio por grupo de todas las columnas: conteos y sumas con bincount sobre los códigos
+    conteos = np.bincount(codigos, minlength=len(grupos))
+    sumas = np.column_stack([
+        np.bincount(codigos, weights=valores[:, j], minlength=len(grupos))
+        for j in range(len(columnas_existentes))
+    ])
+    
+    # Crear DataFrame para resultados (convertido a porcentaje)
+    resultados = pd.DataFrame(sumas / conteos[:, None] * 100, columns=columnas_existentes)
+    resultados.insert(0, columna_grupo, grupos)
     
     # Calcular promedio general
     resultados['promedio_general'] = resultados[columnas_existentes].mean(axis=1)
     
-    # Ordenar por promedio general
-    resultados = resultados.sort_values(by='promedio_general', ascending=False)
-    
-    # Obtener los 3 mejores y los 3 peores
-    mejores = resultados.head(min(3, len(resultados))).to_dict('records')
-    peores = resultados.tail(min(3, len(resultados))).to_dict('records')
+    # Orden descendente estable (los empates conservan el orden de los grupos): los 3 mejores son
+    # la cabeza y los 3 peores la cola del mismo orden, de mayor a menor; con menos de 6 grupos
+    # ambas listas pueden compartir grupos, como con head(3) y tail(3)
+    orden = np.argsort(-resultados['promedio_general'].to_numpy(), kind='stable')
+    mejores = resultados.iloc[orden[:3]].to_dict('records')
+    peores = resultados.iloc[orden[-3:]].to_dict('records')
     
-    return mejores, peores
\ No newline at end of file
+    return mejores, peores
@@ -1,23 +1,28 @@
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
+from utils.metrics import calcular_porcentajes
 
-def calcular_porcentaje(df, columna):
+def conteo_si_no(df, columna):
     """
-    Calcula el porcentaje de valores positivos (1) en una columna.
+    Cuenta las respuestas Sí (1) y No (0) de una columna con dos comparaciones sobre el arreglo.
     
     Args:
         df (pandas.DataFrame): DataFrame con los datos.
-        columna (str): Nombre de la columna a calcular.
+        columna (str): Nombre de la columna Sí/No.
     
     Returns:
-        float: Porcentaje de valores positivos (1).
+        pandas.DataFrame: Filas Sí y No con columnas Respuesta, Conteo y Porcentaje.
     """
-    if columna not in df.columns or df.empty:
-        return 0
-    return round((df[columna].sum() / len(df)) * 100, 2)
+    valores = df[columna].to_numpy()
+    conteos = np.array([np.count_nonzero(valores == 1), np.count_nonzero(valores == 0)])
+    total = conteos.sum()
+    return pd.DataFrame({
+        'Respuesta': ['Sí', 'No'],
+        'Conteo': conteos,
+        'Porcentaje': np.round(conteos / total * 100, 2) if total else np.zeros(2)
+    })
 
 def crear_grafico_barras(df, columna, titulo, color_positivo="#4CAF50", color_negativo="#EF4444"):
     """
@@ -33,26 +38,23 @@ def crear_grafico_barras(df, columna, titulo, color_positivo="#4CAF50", color_ne
     Returns:
         plotly.graph_objects.Figure: Figura de Plotly con el gráfico de barras.
     """
-    # Contar valores y calcular porcentajes
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Valor', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
-    
-    # Mapear 0/1 a No/Sí
-    conteo['Respuesta'] = conteo['Valor'].map({1: 'Sí', 0: 'No'})
+    if columna not in df.columns or df.empty:
+        return None
     
-    # Crear gráfico
-    fig = px.bar(
-        conteo,
-        x='Respuesta',
-        y='Porcentaje',
-        text=conteo['Porcentaje'].apply(lambda x: f'{x}%'),
-        color='Respuesta',
-        color_discrete_map={'Sí': color_positivo, 'No': color_negativo},
-        title=titulo
-    )
+    # Contar valores y calcular porcentajes
+    conteo = conteo_si_no(df, columna)
+    
+    # Crear gráfico (trazo directo, sin el andamiaje de plotly.express)
+    porcentaje = conteo['Porcentaje'].to_numpy()
+    fig = go.Figure(go.Bar(
+        x=conteo['Respuesta'].to_numpy(),
+        y=porcentaje,
+        text=np.char.add(porcentaje.astype(str), '%'),
+        marker_color=[color_positivo, color_negativo]
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='',
         yaxis_title='Porcentaje (%)',
         yaxis_range=[0, 100]
@@ -74,30 +76,24 @@ def crear_grafico_pastel(df, columna, titulo, color_si='#4CAF50', color_no='#EF4
     Returns:
         plotly.graph_objects.Figure: Figura de Plotly con el gráfico de pastel.
     """
-    # Contar valores y calcular porcentajes
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Valor', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
+    if columna not in df.columns or df.empty:
+        return None
     
-    # Mapear 0/1 a No/Sí
-    conteo['Respuesta'] = conteo['Valor'].map({1: 'Sí', 0: 'No'})
+    # Contar valores y calcular porcentajes
+    conteo = conteo_si_no(df, columna)
     
-    # Crear gráfico
-    fig = px.pie(
-        conteo,
-        values='Conteo',
-        names='Respuesta',
-        title=titulo,
+    # Crear gráfico (trazo directo, sin el andamiaje de plotly.express)
+    fig = go.Figure(go.Pie(
+        labels=conteo['Respuesta'].to_numpy(),
+        values=conteo['Conteo'].to_numpy(),
         hole=0.4,
-        color='Respuesta',
-        color_discrete_map={'Sí': color_si, 'No': color_no}
-    )
-    
-    fig.update_traces(
+        sort=False,
         textposition='inside',
         textinfo='percent+label',
-        marker=dict(line=dict(color='#FFFFFF', width=2))
-    )
+        marker=dict(colors=[color_si, color_no], line=dict(color='#FFFFFF', width=2))
+    ))
+    
+    fig.update_layout(title=titulo)
     
     return fig
 
@@ -116,28 +112,57 @@ def crear_grafico_pastel_categorias(df, columna, titulo):
     if columna not in df.columns or df.empty:
         return None
     
-    # Contar valores y calcular porcentajes
-    conteo = df[columna].value_counts().reset_index()
-    conteo.columns = ['Categoría', 'Conteo']
-    conteo['Porcentaje'] = round(conteo['Conteo'] / conteo['Conteo'].sum() * 100, 2)
-    
-    # Crear gráfico
-    fig = px.pie(
-        conteo,
-        values='Conteo',
-        names='Categoría',
-        title=titulo,
-        hole=0.4
-    )
+    # Contar valores por categoría
+    conteo = df[columna].value_counts()
     
-    fig.update_traces(
+    # Crear gráfico (trazo directo, sin el andamiaje de plotly.express)
+    fig = go.Figure(go.Pie(
+        labels=conteo.index.to_numpy(),
+        values=conteo.to_numpy(),
+        hole=0.4,
         textposition='inside',
         textinfo='percent+label',
         marker=dict(line=dict(color='#FFFFFF', width=2))
-    )
+    ))
+    
+    fig.update_layout(title=titulo)
     
     return fig
 
+def calcular_promedios_por_grupo(df, columna_grupo, columnas):
+    """
+    Calcula el porcentaje promedio por grupo de varias columnas en una sola pasada.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos.
+        columna_grupo (str): Nombre de la columna por la que agrupar.
+        columnas (list): Columnas existentes a promediar.
+    
+    Returns:
+        pandas.DataFrame: Porcentajes (0-100) con un grupo por fila y una columna por indicador.
+    """
+    columnas = list(columnas)
+    bloque = df[columnas].to_numpy()
+    
+    # Con faltantes en los indicadores se mantiene el promedio de pandas (ignora NaN por celda)
+    if bloque.dtype.kind == 'f' and np.isnan(bloque).any():
+        return df.groupby(columna_grupo, observed=True)[columnas].mean() * 100
+    
+    # Códigos de grupo (ordenados como en groupby; los faltantes quedan con -1 y se descartan)
+    codigos, grupos = pd.factorize(df[columna_grupo], sort=True)
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    bloque = bloque[validos]
+    
+    # Conteos y sumas por grupo con bincount sobre los códigos, sin construir un GroupBy
+    conteos = np.bincount(codigos, minlength=len(grupos))
+    sumas = np.column_stack([
+        np.bincount(codigos, weights=bloque[:, j], minlength=len(grupos))
+        for j in range(len(columnas))
+    ])
+    
+    return pd.DataFrame(sumas / conteos[:, None] * 100, index=grupos.rename(columna_grupo), columns=columnas)
+
 def crear_grafico_barras_por_grupo(df, columna_grupo, columna_dato, titulo, color_scale='Blues'):
     """
     Crea un gráfico de barras agrupado por una columna.
@@ -155,25 +180,23 @@ def crear_grafico_barras_por_grupo(df, columna_grupo, columna_dato, titulo, colo
     if columna_grupo not in df.columns or df.empty or columna_dato not in df.columns:
         return None
     
-    # Agrupar por la columna de grupo y calcular promedio
-    resultados = df.groupby(columna_grupo)[columna_dato].mean().reset_index()
-    resultados[columna_dato] = resultados[columna_dato] * 100  # Convertir a porcentaje
+    # Agrupar por la columna de grupo y calcular promedio en porcentaje
+    resultados = calcular_promedios_por_grupo(df, columna_grupo, [columna_dato]).reset_index()
     
     # Ordenar por valor descendente
     resultados = resultados.sort_values(by=columna_dato, ascending=False)
     
-    # Crear gráfico
-    fig = px.bar(
-        resultados,
-        x=columna_grupo,
-        y=columna_dato,
-        text=resultados[columna_dato].apply(lambda x: f'{x:.1f}%'),
-        title=titulo,
-        color=columna_dato,
-        color_continuous_scale=color_scale
-    )
+    # Crear gráfico (trazo directo, coloreado por valor con la escala indicada)
+    valores = resultados[columna_dato].to_numpy()
+    fig = go.Figure(go.Bar(
+        x=resultados[columna_grupo].to_numpy(),
+        y=valores,
+        text=np.char.mod('%.1f%%', valores),
+        marker=dict(color=valores, colorscale=color_scale, showscale=True, colorbar=dict(title=columna_dato))
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title=columna_grupo.capitalize(),
         yaxis_title='Porcentaje (%)',
         yaxis_range=[0, 100]
@@ -204,44 +227,23 @@ def crear_grafico_barras_multiple(df, columna_grupo, columnas_datos, titulo, col
     if not columnas_existentes:
         return None
     
-    # Crear DataFrame para resultados
-    resultados = pd.DataFrame()
-    
-    # Para cada columna, calcular promedio por grupo
-    for col in columnas_existentes:
-        # Agrupar por la columna de grupo y calcular promedio
-        temp = df.groupby(columna_grupo)[col].mean().reset_index()
-        temp[col] = temp[col] * 100  # Convertir a porcentaje
-        
-        # Renombrar columna para mejor visualización
-        temp.rename(columns={col: col.replace('_', ' ').title()}, inplace=True)
-        
-        # Iniciar o unir con resultados
-        if resultados.empty:
-            resultados = temp
-        else:
-            resultados = resultados.merge(temp, on=columna_grupo)
-    
-    # Convertir a formato largo para Plotly
-    resultados_melted = pd.melt(
-        resultados,
-        id_vars=[columna_grupo],
-        value_name='Porcentaje',
-        var_name='Indicador'
-    )
+    # Promedio por grupo de todas las columnas en una sola pasada
+    resultados = calcular_promedios_por_grupo(df, columna_grupo, columnas_existentes)
     
-    # Crear gráfico
-    fig = px.bar(
-        resultados_melted,
-        x=columna_grupo,
-        y='Porcentaje',
-        color='Indicador',
-        title=titulo,
-        barmode='group',
-        text=resultados_melted['Porcentaje'].apply(lambda x: f'{x:.1f}%')
-    )
+    # Sin pasar a formato largo: cada indicador es una columna del bloque (grupos x indicadores)
+    grupos = resultados.index.to_numpy()
+    bloque = resultados.to_numpy()
+    textos = np.char.mod('%.1f%%', bloque)
+    
+    # Crear gráfico con una serie de barras por indicador (nombre legible en la leyenda)
+    fig = go.Figure([
+        go.Bar(x=grupos, y=bloque[:, i], text=textos[:, i], name=col.replace('_', ' ').title())
+        for i, col in enumerate(columnas_existentes)
+    ])
     
     fig.update_layout(
+        title=titulo,
+        barmode='group',
         xaxis_title=columna_grupo.capitalize(),
         yaxis_title='Porcentaje (%)',
         yaxis_range=[0, 100],
@@ -264,34 +266,31 @@ def crear_grafico_linea_temporal(df, columna, titulo, color='#4CAF50'):
         plotly.graph_objects.Figure: Figura de Plotly con el gráfico de línea.
     """
     # Asegurarse que fecha es datetime
-    if 'fecha' not in df.columns:
+    if 'fecha' not in df.columns or columna not in df.columns or df.empty:
         return None
     
-    # Convertir a datetime si no lo es ya
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+    # Convertir a datetime si no lo es ya (sobre una copia local, sin modificar df)
+    fechas = df['fecha']
+    if not pd.api.types.is_datetime64_any_dtype(fechas):
+        fechas = pd.to_datetime(fechas, errors='coerce')
     
-    # Agrupar por mes
-    df['mes'] = df['fecha'].dt.to_period('M')
+    # Agrupar por mes truncando el datetime64 a meses (sin objetos Period); NaT queda fuera
+    mes = fechas.to_numpy().astype('datetime64[M]').astype('datetime64[ns]')
     
     # Calcular promedio por mes
-    datos_tiempo = df.groupby('mes')[columna].mean().reset_index()
-    datos_tiempo['mes'] = datos_tiempo['mes'].dt.to_timestamp()
+    datos_tiempo = df[columna].groupby(mes).mean().rename_axis('mes').reset_index()
     datos_tiempo[columna] = datos_tiempo[columna] * 100  # Convertir a porcentaje
     
-    # Crear gráfico
-    fig = px.line(
-        datos_tiempo,
-        x='mes',
-        y=columna,
-        markers=True,
-        title=titulo,
-        line_shape='linear'
-    )
-    
-    fig.update_traces(line_color=color)
+    # Crear gráfico (trazo directo, sin el andamiaje de plotly.express)
+    fig = go.Figure(go.Scatter(
+        x=datos_tiempo['mes'].to_numpy(),
+        y=datos_tiempo[columna].to_numpy(),
+        mode='lines+markers',
+        line=dict(color=color, shape='linear')
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='Fecha',
         yaxis_title='Porcentaje (%)',
         yaxis_range=[0, 100]
@@ -318,8 +317,8 @@ def crear_grafico_radar(df, columnas, labels=None, color='rgb(0, 153, 76)'):
     if len(columnas_existentes) < 3:  # Necesitamos al menos 3 columnas para un radar útil
         return None
     
-    # Calcular porcentajes para cada columna
-    valores = [calcular_porcentaje(df, col) for col in columnas_existentes]
+    # Calcular porcentajes de todas las columnas con una sola reducción sobre el bloque
+    valores = calcular_porcentajes(df, columnas_existentes)
     
     # Usar etiquetas proporcionadas o los nombres de columnas
     if not labels:
@@ -349,6 +348,61 @@ def crear_grafico_radar(df, columnas, labels=None, color='rgb(0, 153, 76)'):
     
     return fig
 
+# Nombres legibles de los indicadores en el mapa de calor por comunas
+NOMBRES_MAPA_CALOR = {
+    'comedor_facil_Acceso': 'Acceso Fácil',
+    'vehiculo_puede_llegar_a_sitio': 'Vehículo Llega Directo',
+    'trasbordo': 'Requiere Trasbordo',
+    'ingreso_apoyo_comunidad': 'Requiere Apoyo Comunidad',
+    'demora_entregas': 'Causa Demoras',
+    'inocuidad_comprometida': 'Compromete Inocuidad',
+    'entrega_en_dia_programado': 'Entrega en Día Programado',
+    'alimentos_debidamente_entregados': 'Alimentos Verificados',
+    'vehiculo_limpio_buen_estado': 'Vehículo Limpio',
+    'alimentos_de_calidad_cantidad': 'Alimentos de Calidad',
+    'contenedores_para_cada_tipoalimento': 'Contenedores Adecuados',
+    'actitud_conductor_respetuosa_colaborativa': 'Actitud Conductor',
+    'actitud_auxiliar_respetuosa_colaborativa': 'Actitud Auxiliar',
+    'actitud_gestora_respetuosa_colaborativa': 'Actitud Gestora',
+    'buena_disposicion_recibir_mercados': 'Disposición Recepción',
+    'comunicacion_efectiva': 'Comunicación Efectiva',
+    'resolucion_inconvenientes': 'Resolución Problemas'
+}
+
+# Nombres legibles (más cortos) de los indicadores en la matriz de correlación
+NOMBRES_CORRELACION = {
+    'comedor_facil_Acceso': 'Acceso Fácil',
+    'vehiculo_puede_llegar_a_sitio': 'Vehículo Llega',
+    'trasbordo': 'Trasbordo',
+    'ingreso_apoyo_comunidad': 'Apoyo Comunidad',
+    'demora_entregas': 'Demora Entregas',
+    'inocuidad_comprometida': 'Inocuidad Comprometida',
+    'entrega_en_dia_programado': 'Entrega en Día',
+    'alimentos_debidamente_entregados': 'Alimentos Verificados',
+    'vehiculo_limpio_buen_estado': 'Vehículo Limpio',
+    'alimentos_de_calidad_cantidad': 'Alimentos Calidad',
+    'contenedores_para_cada_tipoalimento': 'Contenedores Adecuados',
+    'actitud_conductor_respetuosa_colaborativa': 'Actitud Conductor',
+    'actitud_auxiliar_respetuosa_colaborativa': 'Actitud Auxiliar',
+    'actitud_gestora_respetuosa_colaborativa': 'Actitud Gestora',
+    'buena_disposicion_recibir_mercados': 'Disposición Recepción',
+    'comunicacion_efectiva': 'Comunicación',
+    'resolucion_inconvenientes': 'Resolución Problemas'
+}
+
+def textos_celdas(z, formato):
+    """
+    Formatea los valores de una matriz para mostrarlos dentro de las celdas de un mapa de calor.
+    
+    Args:
+        z (numpy.ndarray): Matriz de valores.
+        formato (str): Formato printf de cada celda (por ejemplo '%.1f').
+    
+    Returns:
+        numpy.ndarray: Matriz de textos; las celdas sin valor quedan vacías.
+    """
+    return np.where(np.isnan(z), '', np.char.mod(formato, z))
+
 def crear_mapa_calor_comunas(df, columnas, titulo, color_scale='RdYlGn'):
     """
     Crea un mapa de calor por comunas para variables seleccionadas.
@@ -366,68 +420,40 @@ def crear_mapa_calor_comunas(df, columnas, titulo, color_scale='RdYlGn'):
     if 'comuna' not in df.columns or df.empty:
         return None
     
-    # Crear DataFrame para resultados
-    resultados = pd.DataFrame()
-    
-    # Para cada columna, calcular promedio por comuna
-    for col in columnas:
-        if col in df.columns:
-            # Agrupar por comuna y calcular promedio (0-1)
-            temp = df.groupby('comuna')[col].mean().reset_index()
-            # Convertir a porcentaje
-            temp[col] = temp[col] * 100
-            
-            # Iniciar o unir con resultados
-            if resultados.empty:
-                resultados = temp
-            else:
-                resultados = resultados.merge(temp, on='comuna')
+    # Verificar que existen las columnas
+    columnas_existentes = [col for col in columnas if col in df.columns]
     
     # Si no hay resultados, retornar None
-    if resultados.empty:
+    if not columnas_existentes:
         return None
     
-    # Preparar datos para mapa de calor
-    resultados_pivot = resultados.set_index('comuna')
-    
-    # Mapear nombres de columnas a nombres más legibles
-    column_mapping = {
-        'comedor_facil_Acceso': 'Acceso Fácil',
-        'vehiculo_puede_llegar_a_sitio': 'Vehículo Llega Directo',
-        'trasbordo': 'Requiere Trasbordo',
-        'ingreso_apoyo_comunidad': 'Requiere Apoyo Comunidad',
-        'demora_entregas': 'Causa Demoras',
-        'inocuidad_comprometida': 'Compromete Inocuidad',
-        'entrega_en_dia_programado': 'Entrega en Día Programado',
-        'alimentos_debidamente_entregados': 'Alimentos Verificados',
-        'vehiculo_limpio_buen_estado': 'Vehículo Limpio',
-        'alimentos_de_calidad_cantidad': 'Alimentos de Calidad',
-        'contenedores_para_cada_tipoalimento': 'Contenedores Adecuados',
-        'actitud_conductor_respetuosa_colaborativa': 'Actitud Conductor',
-        'actitud_auxiliar_respetuosa_colaborativa': 'Actitud Auxiliar',
-        'actitud_gestora_respetuosa_colaborativa': 'Actitud Gestora',
-        'buena_disposicion_recibir_mercados': 'Disposición Recepción',
-        'comunicacion_efectiva': 'Comunicación Efectiva',
-        'resolucion_inconvenientes': 'Resolución Problemas'
-    }
-    
-    # Renombrar columnas si existen en el mapping
-    resultados_pivot.columns = [column_mapping.get(col, col) for col in resultados_pivot.columns]
+    # Promedio por comuna de todas las columnas en una sola pasada
+    resultados_pivot = calcular_promedios_por_grupo(df, 'comuna', columnas_existentes)
     
-    # Crear figura
-    fig = px.imshow(
-        resultados_pivot.T,
-        text_auto='.1f',
-        labels=dict(x='Comuna', y='Indicador', color='Porcentaje (%)'),
-        title=titulo,
-        color_continuous_scale=color_scale,
-        aspect='auto'
-    )
+    if resultados_pivot.empty:
+        return None
+    
+    # Renombrar columnas a nombres más legibles si existen en el mapping
+    resultados_pivot.rename(columns=NOMBRES_MAPA_CALOR, inplace=True)
+    
+    # Crear figura (indicadores en filas, comunas en columnas; textos de celda ya formateados)
+    z = resultados_pivot.to_numpy().T
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=resultados_pivot.index.to_numpy(),
+        y=resultados_pivot.columns.to_numpy(),
+        text=textos_celdas(z, '%.1f'),
+        texttemplate='%{text}',
+        colorscale=color_scale,
+        colorbar=dict(title='%'),
+        hovertemplate='Comuna: %{x}<br>Indicador: %{y}<br>Porcentaje (%): %{z}<extra></extra>'
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='Comuna',
         yaxis_title='Indicador',
-        coloraxis_colorbar=dict(title='%')
+        yaxis_autorange='reversed'
     )
     
     return fig
@@ -450,47 +476,39 @@ def crear_grafico_correlacion(df, columnas, titulo):
     if len(columnas_existentes) < 2:  # Necesitamos al menos 2 columnas para correlación
         return None
     
-    # Calcular matriz de correlación
-    df_corr = df[columnas_existentes].corr()
-    
-    # Mapear nombres de columnas a nombres más legibles
-    column_mapping = {
-        'comedor_facil_Acceso': 'Acceso Fácil',
-        'vehiculo_puede_llegar_a_sitio': 'Vehículo Llega',
-        'trasbordo': 'Trasbordo',
-        'ingreso_apoyo_comunidad': 'Apoyo Comunidad',
-        'demora_entregas': 'Demora Entregas',
-        'inocuidad_comprometida': 'Inocuidad Comprometida',
-        'entrega_en_dia_programado': 'Entrega en Día',
-        'alimentos_debidamente_entregados': 'Alimentos Verificados',
-        'vehiculo_limpio_buen_estado': 'Vehículo Limpio',
-        'alimentos_de_calidad_cantidad': 'Alimentos Calidad',
-        'contenedores_para_cada_tipoalimento': 'Contenedores Adecuados',
-        'actitud_conductor_respetuosa_colaborativa': 'Actitud Conductor',
-        'actitud_auxiliar_respetuosa_colaborativa': 'Actitud Auxiliar',
-        'actitud_gestora_respetuosa_colaborativa': 'Actitud Gestora',
-        'buena_disposicion_recibir_mercados': 'Disposición Recepción',
-        'comunicacion_efectiva': 'Comunicación',
-        'resolucion_inconvenientes': 'Resolución Problemas'
-    }
-    
-    # Renombrar índices y columnas
-    df_corr.index = [column_mapping.get(col, col) for col in df_corr.index]
-    df_corr.columns = [column_mapping.get(col, col) for col in df_corr.columns]
-    
-    # Crear figura
-    fig = px.imshow(
-        df_corr,
-        text_auto='.2f',
-        labels=dict(x='Indicador', y='Indicador', color='Correlación'),
-        title=titulo,
-        color_continuous_scale='RdBu_r',
-        range_color=[-1, 1]
-    )
+    # Calcular matriz de correlación: sin faltantes (indicadores 0/1 del cargador) basta un
+    # producto matricial sobre el bloque; con NaN se mantiene la correlación por pares de pandas
+    bloque = df[columnas_existentes].to_numpy(np.float64)
+    if np.isnan(bloque).any():
+        df_corr = df[columnas_existentes].corr()
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matriz = np.corrcoef(bloque, rowvar=False)
+        df_corr = pd.DataFrame(matriz, index=columnas_existentes, columns=columnas_existentes)
+    
+    # Renombrar índices y columnas a nombres más legibles
+    df_corr.rename(index=NOMBRES_CORRELACION, columns=NOMBRES_CORRELACION, inplace=True)
+    
+    # Crear figura (textos de celda ya formateados)
+    z = df_corr.to_numpy()
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=df_corr.columns.to_numpy(),
+        y=df_corr.index.to_numpy(),
+        text=textos_celdas(z, '%.2f'),
+        texttemplate='%{text}',
+        colorscale='RdBu_r',
+        zmin=-1,
+        zmax=1,
+        colorbar=dict(title='Correlación'),
+        hovertemplate='%{x}<br>%{y}<br>Correlación: %{z}<extra></extra>'
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='',
         yaxis_title='',
+        yaxis=dict(autorange='reversed', scaleanchor='x'),
         height=600,
         width=700
     )
@@ -514,24 +532,29 @@ def crear_histograma(df, columna, titulo, n_bins=20, color='#4CAF50'):
     if columna not in df.columns or df.empty:
         return None
     
-    # Filtrar filas donde la columna tiene valores mayores que 0
-    df_filtrado = df[df[columna] > 0]
+    # Filtrar valores mayores que 0 sobre el arreglo de la columna (sin copiar las demás)
+    valores = df[columna].to_numpy()
+    valores = valores[valores > 0]
     
-    if df_filtrado.empty:
+    if not valores.size:
         return None
     
+    # Conteos por bin calculados con NumPy: solo n_bins barras viajan al navegador
+    conteos, bordes = np.histogram(valores, bins=n_bins)
+    
     # Crear gráfico
-    fig = px.histogram(
-        df_filtrado,
-        x=columna,
-        nbins=n_bins,
-        title=titulo,
-        color_discrete_sequence=[color]
-    )
+    fig = go.Figure(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2,
+        y=conteos,
+        width=np.diff(bordes),
+        marker_color=color
+    ))
     
     fig.update_layout(
+        title=titulo,
         xaxis_title='Valor',
-        yaxis_title='Frecuencia'
+        yaxis_title='Frecuencia',
+        bargap=0
     )
     
     return fig
@@ -552,22 +575,18 @@ def crear_boxplot(df, columna, titulo, color='#4CAF50'):
     if columna not in df.columns or df.empty:
         return None
     
-    # Filtrar filas donde la columna tiene valores mayores que 0
-    df_filtrado = df[df[columna] > 0]
+    # Filtrar valores mayores que 0 sobre el arreglo de la columna (sin copiar las demás)
+    valores = df[columna].to_numpy()
+    valores = valores[valores > 0]
     
-    if df_filtrado.empty:
+    if not valores.size:
         return None
     
     # Crear gráfico
-    fig = px.box(
-        df_filtrado,
-        y=columna,
-        title=titulo
-    )
-    
-    fig.update_traces(marker_color=color)
+    fig = go.Figure(go.Box(y=valores, marker_color=color))
     
     fig.update_layout(
+        title=titulo,
         yaxis_title='Valor'
     )
     